@@ -2,15 +2,29 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QSpinBox, QMessageBox, QStackedWidget, QWidget, QProgressBar
 )
-from PyQt6.QtGui import QFont, QIcon
+from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
 
+import assets
+from assessment_schema import DEFAULT_SCHEMA
+
 
 class AddStudentDialog(QDialog):
-    def __init__(self):
+    # One step for the name, one for the ID, then one per assessment
+    # component, each spin box bounded by the component's maximum. Enter
+    # moves to the next step (or finishes on the last one).
+    #
+    # With on_entry the dialog stays open for rapid entry from paper score
+    # sheets: each Finish passes the data to on_entry and clears the form
+    # for the next student. on_entry returns an error message to reject an
+    # entry (the ID step is shown again), or None.
+    def __init__(self, schema=DEFAULT_SCHEMA, on_entry=None):
         super().__init__()
-        self.setWindowTitle("Add New Student")
-        self.setWindowIcon(QIcon("./images/add.png"))
+        self.schema = schema
+        self.on_entry = on_entry
+        self.entered = 0
+        self.setWindowTitle("Add New Student" if on_entry is None else "Rapid Entry")
+        self.setWindowIcon(assets.icon("add.png"))
         self.setFixedSize(500, 320)
         self.setStyleSheet("""
             QDialog {
@@ -54,12 +68,8 @@ class AddStudentDialog(QDialog):
         self.current_step = 0
         self.steps = []
         self.stacked_widget = QStackedWidget()
-        self.step_titles = [
-            "Student Name",
-            "ID Number",
-            "C.A (0-30)",
-            "Practical (0-20)",
-            "Exam (0-50)"
+        self.step_titles = ["Student Name", "ID Number"] + [
+            f"{label} (0-{maximum})" for label, maximum in zip(schema.labels, schema.maxima.tolist())
         ]
 
         self.name_input = QLineEdit()
@@ -70,25 +80,19 @@ class AddStudentDialog(QDialog):
         self.id_input.setPlaceholderText("CSC/22U/XXXX")
         self.id_input.textChanged.connect(self.validate_current)
 
-        self.ca_input = QSpinBox()
-        self.ca_input.setRange(0, 30)
-
-        self.practical_input = QSpinBox()
-        self.practical_input.setRange(0, 20)
-
-        self.exam_input = QSpinBox()
-        self.exam_input.setRange(0, 50)
+        self.score_inputs = []
+        for maximum in schema.maxima.tolist():
+            spin_box = QSpinBox()
+            spin_box.setRange(0, maximum)
+            self.score_inputs.append(spin_box)
 
         inputs = [
-            (self.name_input, "images/user.png"),
-            (self.id_input, "images/id.png"),
-            (self.ca_input, "images/ca.png"),
-            (self.practical_input, "images/practical.png"),
-            (self.exam_input, "images/exam.png")
-        ]
+            (self.name_input, "user.png"),
+            (self.id_input, "id.png"),
+        ] + [(spin_box, f"{key}.png") for spin_box, key in zip(self.score_inputs, schema.keys)]
 
-        for index, (widget, icon_path) in enumerate(inputs):
-            page = self.create_input_page(widget, self.step_titles[index], icon_path)
+        for index, (widget, icon_name) in enumerate(inputs):
+            page = self.create_input_page(widget, self.step_titles[index], icon_name)
             self.steps.append(page)
             self.stacked_widget.addWidget(page)
 
@@ -97,7 +101,7 @@ class AddStudentDialog(QDialog):
         self.layout.setContentsMargins(20, 20, 20, 20)
         self.setLayout(self.layout)
 
-        self.step_label = QLabel("Step 1 of 5")
+        self.step_label = QLabel(f"Step 1 of {len(self.steps)}")
         self.step_label.setAlignment(Qt.AlignmentFlag.AlignRight)
         self.step_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
 
@@ -115,10 +119,13 @@ class AddStudentDialog(QDialog):
         nav_layout = QHBoxLayout()
         self.back_btn = QPushButton("◀ Back")
         self.reset_btn = QPushButton("Reset")
-        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn = QPushButton("Cancel" if on_entry is None else "Done")
         self.next_btn = QPushButton("Next ▶")
         self.finish_btn = QPushButton("✓ Finish")
 
+        for button in (self.back_btn, self.reset_btn, self.cancel_btn, self.next_btn, self.finish_btn):
+            # Enter is handled in keyPressEvent, not by a default button.
+            button.setAutoDefault(False)
         self.back_btn.clicked.connect(self.go_back)
         self.next_btn.clicked.connect(self.go_next)
         self.finish_btn.clicked.connect(self.finish)
@@ -137,7 +144,16 @@ class AddStudentDialog(QDialog):
         self.layout.addLayout(nav_layout)
         self.update_ui()
 
-    def create_input_page(self, widget, label_text, icon_path):
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            if self.current_step == len(self.steps) - 1:
+                self.finish()
+            elif self.next_btn.isEnabled():
+                self.go_next()
+            return
+        super().keyPressEvent(event)
+
+    def create_input_page(self, widget, label_text, icon_name):
         page = QWidget()
         layout = QVBoxLayout()
 
@@ -145,7 +161,7 @@ class AddStudentDialog(QDialog):
         label.setFont(QFont("Segoe UI", 11))
 
         icon = QLabel()
-        icon.setPixmap(QIcon(icon_path).pixmap(24, 24))
+        icon.setPixmap(assets.pixmap(icon_name, 24, 24))
         icon.setFixedSize(26, 26)
 
         input_layout = QHBoxLayout()
@@ -173,12 +189,18 @@ class AddStudentDialog(QDialog):
         return self.steps[self.current_step].layout().itemAt(1).layout().itemAt(1).widget()
 
     def update_ui(self):
-        self.step_label.setText(f"Step {self.current_step + 1} of {len(self.steps)}")
+        step_text = f"Step {self.current_step + 1} of {len(self.steps)}"
+        if self.on_entry is not None:
+            step_text = f"{self.entered} entered  ·  {step_text}"
+        self.step_label.setText(step_text)
         self.progress_bar.setValue(self.current_step)
         self.back_btn.setEnabled(self.current_step > 0)
         self.next_btn.setVisible(self.current_step < len(self.steps) - 1)
         self.finish_btn.setVisible(self.current_step == len(self.steps) - 1)
         self.validate_current()
+        widget = self.get_current_input_widget()
+        widget.setFocus()
+        widget.selectAll()
 
     def go_back(self):
         if self.current_step > 0:
@@ -196,14 +218,24 @@ class AddStudentDialog(QDialog):
         if not self.name_input.text().strip() or not self.id_input.text().strip():
             QMessageBox.warning(self, "Missing Input", "Name and ID Number are required.")
             return
-        self.accept()
+        if self.on_entry is None:
+            self.accept()
+            return
+        error = self.on_entry(self.get_student_data())
+        if error:
+            QMessageBox.warning(self, "Invalid Entry", error)
+            self.current_step = 1
+            self.stacked_widget.setCurrentIndex(self.current_step)
+            self.update_ui()
+            return
+        self.entered += 1
+        self.reset_form()
 
     def reset_form(self):
         self.name_input.clear()
         self.id_input.clear()
-        self.ca_input.setValue(0)
-        self.practical_input.setValue(0)
-        self.exam_input.setValue(0)
+        for spin_box in self.score_inputs:
+            spin_box.setValue(0)
         self.current_step = 0
         self.stacked_widget.setCurrentIndex(self.current_step)
         self.update_ui()
@@ -212,8 +244,5 @@ class AddStudentDialog(QDialog):
         return [
             self.name_input.text().strip(),
             self.id_input.text().strip(),
-            self.ca_input.value(),
-            self.practical_input.value(),
-            self.exam_input.value()
-        ]
+        ] + [spin_box.value() for spin_box in self.score_inputs]
 
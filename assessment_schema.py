@@ -0,0 +1,92 @@
+import json
+import re
+import numpy as np
+
+
+# Totals are always out of MAX_TOTAL, whatever the components, so grade
+# scales, the grade histogram and class positions work for every course.
+MAX_TOTAL = 100
+
+DEFAULT_COMPONENTS = [
+    {"key": "ca", "label": "C.A", "max": 30},
+    {"key": "practical", "label": "Practical", "max": 20},
+    {"key": "exam", "label": "Exam", "max": 50},
+]
+
+# Field names the roster already uses for something else.
+RESERVED_KEYS = {"name", "id_number", "total", "grade", "position"}
+KEY_PATTERN = re.compile(r"[a-z][a-z0-9_]*\Z")
+
+
+class AssessmentSchema:
+    # The scored components of a course, in order. Each has a key (used in
+    # storage, CSV/JSON records and as the table field), a label for
+    # dialogs, headers and PDFs, a maximum raw score and a weight: the share
+    # of the total it carries. Weights add up to MAX_TOTAL; a component
+    # without one is weighted by its maximum, so raw scores that already
+    # add up to 100 are simply summed.
+    #
+    #   {"name": "CSC201", "components": [
+    #       {"key": "test1", "label": "Test 1", "max": 20, "weight": 15},
+    #       {"key": "test2", "label": "Test 2", "max": 20, "weight": 15},
+    #       {"key": "exam", "label": "Exam", "max": 100, "weight": 70}]}
+    def __init__(self, components=None, name="Default"):
+        components = [dict(c) for c in (DEFAULT_COMPONENTS if components is None else components)]
+        if not components:
+            raise ValueError("An assessment schema needs at least one component.")
+        for component in components:
+            key = component.get("key")
+            if not isinstance(key, str) or not KEY_PATTERN.match(key) or key in RESERVED_KEYS:
+                raise ValueError(f"Invalid component key {key!r}: use lower-case letters, digits and _.")
+            component.setdefault("label", key.replace("_", " ").title())
+            maximum = component.get("max")
+            if not isinstance(maximum, int) or not 0 < maximum <= 1000:
+                raise ValueError(f"Maximum for {component['label']} must be a whole number from 1 to 1000.")
+            weight = component.setdefault("weight", maximum)
+            if not isinstance(weight, (int, float)) or weight <= 0:
+                raise ValueError(f"Weight for {component['label']} must be a positive number.")
+        keys = [component["key"] for component in components]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Each component needs a different key.")
+        if abs(sum(component["weight"] for component in components) - MAX_TOTAL) > 1e-6:
+            raise ValueError(f"Component weights must add up to {MAX_TOTAL}.")
+
+        self.name = name
+        self.components = components
+        self.keys = keys
+        self.labels = [component["label"] for component in components]
+        self.maxima = np.array([component["max"] for component in components], dtype=np.int16)
+        self.weights = [component["weight"] for component in components]
+        self.factors = np.array([w / m for w, m in zip(self.weights, self.maxima.tolist())])
+        self.unweighted = bool((self.factors == 1).all())
+
+    def __len__(self):
+        return len(self.components)
+
+    def __eq__(self, other):
+        return isinstance(other, AssessmentSchema) and self.components == other.components
+
+    def __hash__(self):
+        return hash(tuple(self.keys))
+
+    def totals(self, scores):
+        # Weighted totals for a (rows, components) score array, rounded half
+        # up to whole marks.
+        if self.unweighted:
+            return scores.sum(axis=1)
+        return np.floor(scores @ self.factors + 0.5 + 1e-9)
+
+    def to_dict(self):
+        return {"name": self.name, "components": self.components}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("components"), data.get("name", "Custom"))
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+DEFAULT_SCHEMA = AssessmentSchema()
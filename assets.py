@@ -0,0 +1,75 @@
+import base64
+import functools
+import pathlib
+import sys
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIcon, QImage, QPixmap
+
+
+# Images are looked up next to the install rather than the working
+# directory: beside this module when running from source, and in the
+# PyInstaller bundle (or next to the executable) when frozen. Everything
+# decoded from them is cached for the life of the process, so windows,
+# dialogs and print jobs never read the same file twice.
+LOGO = "mau.png"
+
+
+def _asset_dirs():
+    if getattr(sys, "frozen", False):
+        bundle = getattr(sys, "_MEIPASS", None)
+        if bundle:
+            yield pathlib.Path(bundle) / "images"
+        yield pathlib.Path(sys.executable).resolve().parent / "images"
+    yield pathlib.Path(__file__).resolve().parent / "images"
+
+
+@functools.lru_cache(maxsize=None)
+def asset_path(name):
+    for directory in _asset_dirs():
+        path = directory / name
+        if path.exists():
+            return path
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def asset_bytes(name):
+    # Raw file contents, or None when the asset is missing.
+    try:
+        return asset_path(name).read_bytes()
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def img_tag(name=LOGO, height=80):
+    # HTML <img> with the image inlined as a data URI, for QTextDocument.
+    data = asset_bytes(name)
+    if data is None:
+        return "<!-- Logo not found -->"
+    encoded_image = base64.b64encode(data).decode('utf-8')
+    return f'<img src="data:image/png;base64,{encoded_image}" alt="Logo" style="height: {height}px;" />'
+
+
+@functools.lru_cache(maxsize=None)
+def image(name):
+    # QImage is safe to create and paint from worker threads; a missing
+    # asset gives a null image.
+    data = asset_bytes(name)
+    return QImage.fromData(data) if data is not None else QImage()
+
+
+# Pixmaps and icons are GUI-thread only.
+@functools.lru_cache(maxsize=None)
+def pixmap(name, width=None, height=None):
+    result = QPixmap.fromImage(image(name))
+    if width is not None and not result.isNull():
+        return result.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio)
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def icon(name):
+    return QIcon(pixmap(name))
+
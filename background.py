@@ -0,0 +1,49 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class BackgroundTask(QRunnable):
+    # Runs fn(task, *args) on the global thread pool. fn reports progress
+    # through task.report(), which also raises TaskCancelled once cancel()
+    # has been called. Signals are delivered on the GUI thread.
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+        self.is_cancelled = False
+
+    def start(self, pool=None):
+        (pool or QThreadPool.globalInstance()).start(self)
+        return self
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def report(self, done, total):
+        if self.is_cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
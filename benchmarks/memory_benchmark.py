@@ -0,0 +1,88 @@
+# Per-student memory footprint of the roster at 10k/100k/1M records.
+#
+#   python benchmarks/memory_benchmark.py [sizes...]
+#
+# "dict objects" is the original layout (one Student with a __dict__ per
+# record); "cohort" is the column store alone, and "cohort + views" adds a
+# __slots__ Student view for every row, as after scrolling the whole table.
+# Every layout is built from freshly generated records inside the
+# measurement, so the name and ID strings each one keeps are counted, and
+# the records themselves are freed before the reading is taken.
+
+import pathlib
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from student_repository import StudentRepository
+
+
+class DictStudent:
+    def __init__(self, name, id_number, ca, practical, exam):
+        # The generated IDs are already upper-case, so like the cohort
+        # loader this keeps the record's own string.
+        self.name = name
+        self.id_number = id_number
+        self.ca = ca
+        self.practical = practical
+        self.exam = exam
+        self.total = ca + practical + exam
+        self.grade = "A" if self.total >= 70 else "F"
+
+
+def make_records(count):
+    return [
+        {
+            "name": f"Student Number {i}",
+            "id_number": f"CSC/22U/{i:07d}",
+            "ca": i % 31,
+            "practical": i % 21,
+            "exam": i % 51,
+        }
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def build_dict_students(records):
+    return [
+        DictStudent(r["name"], r["id_number"], r["ca"], r["practical"], r["exam"])
+        for r in records
+    ]
+
+
+def build_cohort(records):
+    repository = StudentRepository()
+    repository.load(records)
+    return repository
+
+
+def build_cohort_with_views(records):
+    repository = build_cohort(records)
+    for row in range(len(repository)):
+        repository.at(row)
+    return repository
+
+
+def main(sizes):
+    print(f"{'records':>10} {'dict objects':>14} {'cohort':>10} {'cohort + views':>16}   (bytes/student)")
+    for count in sizes:
+        line = f"{count:>10}"
+        for build, width in ((build_dict_students, 14), (build_cohort, 10), (build_cohort_with_views, 16)):
+            used, result = measure(lambda: build(make_records(count)))
+            line += f" {used / count:>{width}.1f}"
+            del result
+        print(line)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,86 @@
+# Score-sheet build and render time at 1k/10k rows.
+#
+#   python benchmarks/score_sheet_benchmark.py [sizes...]
+#
+# "concat build" is the original html += f"..." loop, "join build" is
+# score_sheet.build_score_sheet_html, "render" measures, paginates and
+# paints the PDF with score_sheet.layout_score_sheet and render_pdf, and "painter" draws the whole
+# sheet directly with score_sheet.paint_pdf (the pdf_renderer = "painter"
+# setting). The HTML sheets carry the letterhead logo, as printed from the
+# app, and the run stops if the rendered page count is off the plan.
+
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication
+
+from report_cards import logo_img_tag
+from score_sheet import ROW, SHEET_HEAD, TABLE_HEAD, SHEET_TAIL, build_score_sheet_html, layout_score_sheet, paint_pdf, render_pdf
+
+
+def make_records(count):
+    return [
+        {
+            "name": f"Student Number {i}",
+            "id_number": f"CSC/22U/{i:05d}",
+            "ca": i % 31,
+            "practical": i % 21,
+            "exam": i % 51,
+            "total": i % 31 + i % 21 + i % 51,
+            "grade": "A",
+            "position": i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def concat_build(records):
+    html = SHEET_HEAD.format(img_tag="") + TABLE_HEAD.format(page_break="")
+    for record in records:
+        html += ROW.format(**record)
+    html += "</table>" + SHEET_TAIL
+    return html
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    print(f"{'rows':>8} {'concat build':>14} {'join build':>12} {'render':>10} {'pages':>6} {'painter':>10} {'pages':>6}")
+    img_tag = logo_img_tag()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            records = make_records(count)
+            concat_time, _ = timed(concat_build, records)
+            join_time, html = timed(build_score_sheet_html, records, img_tag)
+
+            def render():
+                path = os.path.join(tmp, f"sheet_{count}.pdf")
+                document = layout_score_sheet(records, img_tag, path)
+                planned = document.toHtml().count("<table")
+                pages = render_pdf(document, path)
+                if pages != planned:
+                    raise SystemExit(f"{count} rows: {pages} pages rendered, {planned} planned")
+                return pages
+
+            render_time, pages = timed(render)
+            paint_time, paint_pages = timed(paint_pdf, records, os.path.join(tmp, f"painted_{count}.pdf"))
+            print(
+                f"{count:>8} {concat_time:>13.3f}s {join_time:>11.3f}s {render_time:>9.2f}s {pages:>6}"
+                f" {paint_time:>9.2f}s {paint_pages:>6}"
+            )
+    del app
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000])
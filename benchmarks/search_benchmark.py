@@ -0,0 +1,59 @@
+# Search latency at 100k students: the original substring scan over
+# name.lower() against StudentRepository.search (the trigram index).
+#
+#   python benchmarks/search_benchmark.py [count]
+#
+# Index build time is reported separately; it is paid once, on the first
+# search.
+
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from student_repository import StudentRepository
+
+SYLLABLES = ["ab", "du", "la", "hi", "mu", "sa", "ka", "ri", "ya", "na", "fa", "ti", "ma", "zu", "ba", "ha"]
+QUERIES = ["abdula", "hila muka", "CSC/22U/01234", "CSC/22U/012", "zuzu", "qqq"]
+
+
+def make_name(rng):
+    return " ".join(
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(3)
+    )
+
+
+def scan(repository, text):
+    text = text.lower()
+    return [s for s in repository if text in s.name.lower() or text in s.id_number.lower()]
+
+
+def timed(fn, *args, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(count):
+    rng = random.Random(1)
+    repository = StudentRepository()
+    repository.load(
+        {"name": make_name(rng), "id_number": f"CSC/22U/{i:05d}", "ca": 0, "practical": 0, "exam": 0}
+        for i in range(count)
+    )
+    build_time, _ = timed(repository.search, "", repeat=1)
+    print(f"{count} students, index built in {build_time:.2f}s")
+    print(f"{'query':>16} {'matches':>8} {'scan':>10} {'index':>10}")
+    for query in QUERIES:
+        scan_time, _ = timed(scan, repository, query, repeat=1)
+        index_time, matches = timed(repository.search, query)
+        print(f"{query:>16} {len(matches):>8} {scan_time * 1000:>8.1f}ms {index_time * 1000:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,257 @@
+import numpy as np
+from assessment_schema import DEFAULT_SCHEMA, MAX_TOTAL
+from grade_scale import DEFAULT_SCALE
+
+
+class Cohort:
+    # Column store for a roster: names and IDs as Python lists, the score
+    # components of the assessment schema as one (rows, components) NumPy
+    # array, and totals and grade
+    # codes computed for the whole roster in one vectorized pass through the
+    # grade scale's lookup table. Student objects are row views created on
+    # demand and cached in self.views.
+    #
+    # self.sequence numbers the rows in the order they were added. Deleting
+    # swaps the last row into the freed one, so roster order is the order
+    # of self.sequence (see roster_order), not row order.
+    #
+    # self.histogram counts students per total (0..MAX_TOTAL) and is kept
+    # up to date by every write below, so class statistics and grade counts
+    # come from it in time independent of the roster size.
+    def __init__(self, capacity=16, scale=DEFAULT_SCALE, schema=DEFAULT_SCHEMA):
+        self.scale = scale
+        self.schema = schema
+        self.size = 0
+        self.names = []
+        self.ids = []
+        self.views = []
+        self.scores = np.zeros((capacity, len(schema)), dtype=np.int16)
+        self.totals = np.zeros(capacity, dtype=np.int16)
+        self.grade_codes = np.zeros(capacity, dtype=np.int8)
+        self.sequence = np.zeros(capacity, dtype=np.int64)
+        self.next_sequence = 0
+        self.histogram = np.zeros(MAX_TOTAL + 1, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def reserve(self, capacity):
+        if capacity <= len(self.totals):
+            return
+        capacity = max(capacity, 2 * len(self.totals))
+        scores = np.zeros((capacity, len(self.schema)), dtype=self.scores.dtype)
+        scores[:self.size] = self.scores[:self.size]
+        totals = np.zeros(capacity, dtype=self.totals.dtype)
+        totals[:self.size] = self.totals[:self.size]
+        grade_codes = np.zeros(capacity, dtype=self.grade_codes.dtype)
+        grade_codes[:self.size] = self.grade_codes[:self.size]
+        sequence = np.zeros(capacity, dtype=self.sequence.dtype)
+        sequence[:self.size] = self.sequence[:self.size]
+        self.scores, self.totals, self.grade_codes, self.sequence = scores, totals, grade_codes, sequence
+
+    def append(self, name, id_number, scores):
+        row = self.size
+        self.reserve(row + 1)
+        self.names.append(name)
+        self.ids.append(id_number)
+        self.views.append(None)
+        self.scores[row] = scores
+        self.sequence[row] = self.next_sequence
+        self.next_sequence += 1
+        self.size += 1
+        self.regrade(row, row + 1, counted=False)
+        return row
+
+    def extend(self, names, ids, scores):
+        start = self.size
+        stop = start + len(names)
+        self.reserve(stop)
+        self.names.extend(names)
+        self.ids.extend(ids)
+        self.views.extend([None] * len(names))
+        self.scores[start:stop] = scores
+        self.sequence[start:stop] = np.arange(self.next_sequence, self.next_sequence + stop - start)
+        self.next_sequence += stop - start
+        self.size = stop
+        self.regrade(start, stop, counted=False)
+        return start, stop
+
+    def _tally(self, totals, sign):
+        counts = np.bincount(np.clip(totals, 0, MAX_TOTAL), minlength=MAX_TOTAL + 1)
+        self.histogram += sign * counts
+
+    def regrade(self, start=0, stop=None, counted=True):
+        # counted=False for freshly appended rows that are not in the
+        # histogram yet.
+        if stop is None:
+            stop = self.size
+        if counted:
+            self._tally(self.totals[start:stop], -1)
+        self.totals[start:stop] = self.schema.totals(self.scores[start:stop])
+        self.grade_codes[start:stop] = self.scale.grade_codes(self.totals[start:stop])
+        self._tally(self.totals[start:stop], 1)
+
+    def set_scores(self, rows, scores):
+        self._tally(self.totals[rows], -1)
+        self.scores[rows] = scores
+        self.totals[rows] = self.schema.totals(self.scores[rows])
+        self.grade_codes[rows] = self.scale.grade_codes(self.totals[rows])
+        self._tally(self.totals[rows], 1)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        self.grade_codes[:self.size] = scale.grade_codes(self.totals[:self.size])
+
+    def set_schema(self, schema):
+        # Switches to another assessment schema. Components that keep their
+        # key keep their scores (capped at the new maximum), new ones start
+        # at 0, and every total, grade and the histogram are recomputed in
+        # one vectorized pass. Returns how many scores were capped.
+        scores = np.zeros((len(self.totals), len(schema)), dtype=self.scores.dtype)
+        for column, key in enumerate(schema.keys):
+            if key in self.schema.keys:
+                scores[:, column] = self.scores[:, self.schema.keys.index(key)]
+        capped = int((scores[:self.size] > schema.maxima).sum())
+        np.minimum(scores, schema.maxima, out=scores)
+        self.schema = schema
+        self.scores = scores
+        self.histogram[:] = 0
+        self.regrade(counted=False)
+        return capped
+
+    def set_row(self, row, name, scores):
+        self.names[row] = name
+        self.scores[row] = scores
+        self.regrade(row, row + 1)
+
+    def grade(self, row):
+        return self.scale.letters[self.grade_codes[row]]
+
+    def view(self, row):
+        student = self.views[row]
+        if student is None:
+            from student import Student
+            student = Student.view(self, row)
+            self.views[row] = student
+        return student
+
+    def swap_remove(self, row):
+        # Moves the last row into row and returns its old index, or -1 when
+        # row was already last. The removed view is detached onto its own
+        # one-row cohort so outstanding references keep their values.
+        removed = self.views[row]
+        if removed is not None:
+            removed.detach()
+        self._tally(self.totals[row:row + 1], -1)
+        last = self.size - 1
+        moved_from = -1
+        if row != last:
+            self.names[row] = self.names[last]
+            self.ids[row] = self.ids[last]
+            self.views[row] = self.views[last]
+            self.scores[row] = self.scores[last]
+            self.totals[row] = self.totals[last]
+            self.grade_codes[row] = self.grade_codes[last]
+            self.sequence[row] = self.sequence[last]
+            if self.views[row] is not None:
+                self.views[row]._row = row
+            moved_from = last
+        self.names.pop()
+        self.ids.pop()
+        self.views.pop()
+        self.size = last
+        return moved_from
+
+    def snapshot(self):
+        # A detached copy of the columns that a worker thread can read while
+        # the GUI keeps editing the roster.
+        copy = Cohort(capacity=max(self.size, 1), scale=self.scale, schema=self.schema)
+        copy.extend(self.names[:self.size], self.ids[:self.size], self.scores[:self.size])
+        copy.sequence[:self.size] = self.sequence[:self.size]
+        copy.next_sequence = self.next_sequence
+        return copy
+
+    def roster_order(self, rows=None):
+        # rows (default: all of them) in the order the students were added.
+        if rows is None:
+            rows = np.arange(self.size)
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[np.argsort(self.sequence[rows], kind="stable")]
+
+    def records(self, start=0, stop=None):
+        # Serializes straight from the columns without creating row views.
+        if stop is None:
+            stop = self.size
+        return self._records(self.names[start:stop], self.ids[start:stop], slice(start, stop))
+
+    def records_at(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        row_list = rows.tolist()
+        names = [self.names[row] for row in row_list]
+        ids = [self.ids[row] for row in row_list]
+        return self._records(names, ids, rows)
+
+    def _records(self, names, ids, rows):
+        letters = self.scale.letters
+        keys = self.schema.keys
+        scores = self.scores[rows].tolist()
+        totals = self.totals[rows].tolist()
+        codes = self.grade_codes[rows].tolist()
+        for name, id_number, row_scores, total, code in zip(names, ids, scores, totals, codes):
+            record = {"name": name, "id_number": id_number}
+            record.update(zip(keys, row_scores))
+            record["total"] = total
+            record["grade"] = letters[code]
+            yield record
+
+    def grade_counts(self):
+        codes = self.scale.grade_codes(np.arange(MAX_TOTAL + 1))
+        return np.bincount(codes, weights=self.histogram, minlength=len(self.scale.letters)).astype(np.int64)
+
+    def positions(self, rows=None):
+        # Class position by total with standard competition ranking (ties
+        # share a position and the next one is skipped: 1, 2, 2, 4): one
+        # plus the number of students with a higher total, read off the
+        # histogram.
+        higher = np.zeros(MAX_TOTAL + 1, dtype=np.int64)
+        higher[:-1] = np.cumsum(self.histogram[::-1])[::-1][1:]
+        totals = self.totals[:self.size] if rows is None else self.totals[rows]
+        return higher[np.clip(totals, 0, MAX_TOTAL)] + 1
+
+    def position(self, row):
+        return int(self.histogram[min(max(int(self.totals[row]), 0), MAX_TOTAL) + 1:].sum()) + 1
+
+    def quantiles(self, qs):
+        # Totals at the given fractions (0..1), interpolated linearly
+        # between ranks like numpy.quantile, read off the histogram.
+        if not self.size:
+            return [None] * len(qs)
+        cumulative = np.cumsum(self.histogram)
+        result = []
+        for q in qs:
+            position = q * (self.size - 1)
+            below = int(position)
+            low = int(np.searchsorted(cumulative, below, side="right"))
+            high = int(np.searchsorted(cumulative, min(below + 1, self.size - 1), side="right"))
+            result.append(low + (high - low) * (position - below))
+        return result
+
+    def statistics(self):
+        # Count, mean, min, max and pass rate of the totals, plus students
+        # per grade. Passing means any grade above the scale's lowest.
+        count = self.size
+        stats = {
+            "count": count,
+            "mean": None,
+            "min": None,
+            "max": None,
+            "pass_rate": None,
+            "grade_counts": dict(zip(self.scale.letters, self.grade_counts().tolist())),
+        }
+        if count:
+            present = np.flatnonzero(self.histogram)
+            stats["mean"] = float(np.dot(np.arange(MAX_TOTAL + 1), self.histogram)) / count
+            stats["min"] = int(present[0])
+            stats["max"] = int(present[-1])
+            stats["pass_rate"] = 1 - stats["grade_counts"][self.scale.letters[0]] / count
+        return stats
@@ -0,0 +1,49 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+
+EXPORT_FILTERS = "CSV Files (*.csv);;Gzip CSV (*.csv.gz);;JSON Lines (*.jsonl);;Gzip JSON Lines (*.jsonl.gz)"
+
+
+def csv_header(schema):
+    return ["Name", "ID Number", *schema.labels, "Total", "Grade"]
+
+
+def export_format(file_path):
+    name = file_path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    return ("jsonl" if name.endswith(".jsonl") else "csv"), compress
+
+
+def export_students(task, cohort, file_path, chunk_size=5000):
+    # Runs on a BackgroundTask over a Cohort snapshot. Rows are streamed in
+    # chunks into a temporary file next to the destination, which replaces
+    # it only once the export completes.
+    fmt, compress = export_format(file_path)
+    tmp_path = file_path + ".part"
+    total = len(cohort)
+    order = cohort.roster_order()
+    try:
+        raw = gzip.open(tmp_path, "wb") if compress else open(tmp_path, "wb")
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(csv_header(cohort.schema))
+            for start in range(0, total, chunk_size):
+                stop = min(start + chunk_size, total)
+                records = cohort.records_at(order[start:stop])
+                if fmt == "csv":
+                    writer.writerows(list(r.values()) for r in records)
+                else:
+                    f.write("".join(json.dumps(r) + "\n" for r in records))
+                task.report(stop, total)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return file_path
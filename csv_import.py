@@ -0,0 +1,294 @@
+import csv
+import io
+import os
+import numpy as np
+from assessment_schema import DEFAULT_SCHEMA
+from student_repository import normalize_id
+
+
+HEADER_ALIASES = {
+    "name": "name",
+    "studentname": "name",
+    "fullname": "name",
+    "idnumber": "id_number",
+    "id": "id_number",
+    "matricno": "id_number",
+    "matricnumber": "id_number",
+    "regno": "id_number",
+    "ca": "ca",
+    "continuousassessment": "ca",
+    "practical": "practical",
+    "exam": "exam",
+    "examination": "exam",
+}
+
+
+def header_key(header):
+    return "".join(c for c in header.lower() if c.isalnum())
+
+
+def normalize_header(header, schema=DEFAULT_SCHEMA):
+    # Maps a CSV header onto a Student field: a name or ID alias, a schema
+    # component's key or label, or one of the other aliases above.
+    key = header_key(header)
+    field = HEADER_ALIASES.get(key)
+    if field in ("name", "id_number"):
+        return field
+    for component, label in zip(schema.keys, schema.labels):
+        if key in (header_key(component), header_key(label)):
+            return component
+    return field
+
+
+def parse_score(value):
+    value = (value or "").strip()
+    if not value:
+        return 0
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(value)
+    if not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+
+class ImportResult:
+    def __init__(self):
+        self.names = []
+        self.ids = []
+        self.scores = []
+        self.errors = []
+        self.rows_read = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def read_chunks(file_path, chunk_size, progress=None, required=("name", "id_number"), schema=DEFAULT_SCHEMA):
+    # Streams the file as lists of (line_number, {field: value}) rows, with
+    # headers mapped onto Student fields. progress(done, total) is called
+    # with byte offsets after every chunk.
+    total = os.path.getsize(file_path)
+    with open(file_path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [normalize_header(h, schema) for h in header]
+        missing = [field for field in required if field not in fields]
+        if missing:
+            labels = {"name": "Name", "id_number": "ID Number"}
+            raise ValueError(
+                f"{os.path.basename(file_path)} needs "
+                + " and ".join(labels[field] for field in missing)
+                + (" columns." if len(missing) > 1 else " column.")
+            )
+
+        chunk = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            chunk.append((reader.line_num, {f: v for f, v in zip(fields, row) if f}))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+                if progress is not None:
+                    progress(raw.tell(), total)
+        if chunk:
+            yield chunk
+        if progress is not None:
+            progress(total, total)
+
+
+def validate_chunk(chunk, existing_ids, result, schema=DEFAULT_SCHEMA):
+    # Checks names, IDs and duplicates row by row, then the score ranges for
+    # the whole chunk at once.
+    lines = []
+    names = []
+    ids = []
+    scores = []
+    for line_num, row in chunk:
+        name = (row.get("name") or "").strip()
+        id_number = normalize_id(row.get("id_number") or "")
+        if not name:
+            result.errors.append((line_num, "Missing name."))
+            continue
+        if not id_number:
+            result.errors.append((line_num, "Missing ID number."))
+            continue
+        if id_number in existing_ids:
+            result.errors.append((line_num, f"Duplicate ID {id_number}."))
+            continue
+        try:
+            row_scores = [parse_score(row.get(component)) for component in schema.keys]
+        except ValueError as e:
+            result.errors.append((line_num, f"Invalid score '{e}'."))
+            continue
+        existing_ids.add(id_number)
+        lines.append(line_num)
+        names.append(name)
+        ids.append(id_number)
+        scores.append(row_scores)
+
+    if not lines:
+        return
+    # Checked as floats: a whole number too big for an integer array (say
+    # 1e30) must become a line error like any other out-of-range score.
+    scores = np.array(scores, dtype=np.float64)
+    out_of_range = (scores < 0) | (scores > schema.maxima)
+    bad_rows = out_of_range.any(axis=1)
+    for i in np.flatnonzero(bad_rows):
+        problems = ", ".join(
+            f"{label} must be 0-{maximum}"
+            for label, maximum, bad in zip(schema.labels, schema.maxima.tolist(), out_of_range[i])
+            if bad
+        )
+        existing_ids.discard(ids[i])
+        result.errors.append((lines[i], problems + "."))
+    for i in np.flatnonzero(~bad_rows):
+        result.names.append(names[i])
+        result.ids.append(ids[i])
+    result.scores.extend(scores[~bad_rows].astype(np.int32).tolist())
+
+
+def validate_csv(task, file_path, existing_ids, schema=DEFAULT_SCHEMA, chunk_size=2000):
+    # Runs on a BackgroundTask. existing_ids is a private copy of the roster's
+    # IDs; nothing is written until the GUI thread commits the result.
+    result = ImportResult()
+    existing_ids = set(existing_ids)
+    for chunk in read_chunks(file_path, chunk_size, task.report, schema=schema):
+        result.rows_read += len(chunk)
+        validate_chunk(chunk, existing_ids, result, schema)
+    result.errors.sort()
+    return result
+
+
+MISSING = -1
+
+
+class MergeResult:
+    def __init__(self, schema=DEFAULT_SCHEMA):
+        self.schema = schema
+        self.ids = []
+        self.names = []
+        self.scores = []
+        self.errors = []
+        self.conflicts = []
+        self.missing = []
+        self.rows_read = 0
+        self.update_rows = None
+        self.update_scores = None
+        self.new_names = []
+        self.new_ids = []
+        self.new_scores = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def resolve(self, repository):
+        # Splits the joined rows into updates of existing students (keeping
+        # their current value for components no file supplied) and new
+        # students (missing components default to 0 and are reported).
+        # Must run on the GUI thread, against the live roster.
+        rows = np.array([repository.row_of(i) for i in self.ids], dtype=np.int64)
+        components = len(self.schema)
+        scores = np.array(self.scores, dtype=np.int32).reshape(len(self.ids), components)
+        existing = rows != -1
+
+        self.update_rows = rows[existing]
+        current = repository.cohort.scores[self.update_rows]
+        updates = scores[existing]
+        self.update_scores = np.where(updates == MISSING, current, updates)
+
+        self.new_names = []
+        self.new_ids = []
+        new_scores = []
+        for i in np.flatnonzero(~existing):
+            id_number = self.ids[i]
+            if not self.names[i]:
+                self.errors.append(("", 0, f"{id_number} is not on the roster and no file gives a name."))
+                continue
+            missing = [label for label, value in zip(self.schema.labels, scores[i]) if value == MISSING]
+            if missing:
+                self.missing.append((id_number, ", ".join(missing)))
+            self.new_names.append(self.names[i])
+            self.new_ids.append(id_number)
+            new_scores.append(np.where(scores[i] == MISSING, 0, scores[i]))
+        self.new_scores = np.array(new_scores, dtype=np.int32).reshape(len(new_scores), components)
+
+
+def merge_csv_files(task, file_paths, schema=DEFAULT_SCHEMA, chunk_size=2000):
+    # Hash join of several score sheets on normalized id_number. Each file
+    # supplies whichever score columns it has; a blank cell supplies
+    # nothing. The result holds one row per ID with MISSING for components
+    # no file supplied. IDs given two different values for the same
+    # component are reported as conflicts and left out.
+    sizes = [os.path.getsize(path) for path in file_paths]
+    grand_total = sum(sizes)
+    joined = {}
+    conflicted = {}
+    result = MergeResult(schema)
+    components = len(schema)
+    maxima = schema.maxima.tolist()
+
+    for index, file_path in enumerate(file_paths):
+        file_name = os.path.basename(file_path)
+        base = sum(sizes[:index])
+
+        def progress(done, total):
+            task.report(base + done, grand_total)
+
+        for chunk in read_chunks(file_path, chunk_size, progress, required=("id_number",), schema=schema):
+            result.rows_read += len(chunk)
+            for line_num, row in chunk:
+                id_number = normalize_id(row.get("id_number") or "")
+                if not id_number:
+                    result.errors.append((file_name, line_num, "Missing ID number."))
+                    continue
+                try:
+                    values = [
+                        parse_score(row[c]) if (row.get(c) or "").strip() else MISSING
+                        for c in schema.keys
+                    ]
+                except ValueError as e:
+                    result.errors.append((file_name, line_num, f"Invalid score '{e}'."))
+                    continue
+                bad = [v != MISSING and not 0 <= v <= m for v, m in zip(values, maxima)]
+                if any(bad):
+                    problems = ", ".join(
+                        f"{label} must be 0-{maximum}"
+                        for label, maximum, b in zip(schema.labels, maxima, bad)
+                        if b
+                    )
+                    result.errors.append((file_name, line_num, problems + "."))
+                    continue
+
+                entry = joined.get(id_number)
+                if entry is None:
+                    entry = joined[id_number] = ["", [MISSING] * components, [None] * components]
+                name = (row.get("name") or "").strip()
+                if name and not entry[0]:
+                    entry[0] = name
+                for column, value in enumerate(values):
+                    if value == MISSING:
+                        continue
+                    if entry[1][column] == MISSING:
+                        entry[1][column] = value
+                        entry[2][column] = file_name
+                    elif entry[1][column] != value:
+                        conflicted.setdefault(id_number, []).append(
+                            f"{schema.labels[column]} is {entry[1][column]} in {entry[2][column]}"
+                            f" but {value} in {file_name}"
+                        )
+
+    for id_number, (name, values, _) in joined.items():
+        if id_number in conflicted:
+            result.conflicts.append((id_number, "; ".join(conflicted[id_number]) + "."))
+            continue
+        result.ids.append(id_number)
+        result.names.append(name)
+        result.scores.append(values)
+    result.errors.sort()
+    return result
@@ -0,0 +1,53 @@
+import json
+import numpy as np
+
+
+DEFAULT_GRADES = {"A": 70, "B": 60, "C": 50, "D": 45, "E": 40, "F": 0}
+
+
+class GradeScale:
+    # A grading scale compiled into a lookup table holding the grade code of
+    # every possible total, so grading a whole roster is one index operation.
+    def __init__(self, grades=None, name="Default", max_total=100):
+        grades = dict(DEFAULT_GRADES if grades is None else grades)
+        if not grades:
+            raise ValueError("A grade scale needs at least one grade.")
+        for letter, minimum in grades.items():
+            if not isinstance(minimum, int) or not 0 <= minimum <= max_total:
+                raise ValueError(f"Minimum for grade {letter} must be a whole number from 0 to {max_total}.")
+        if len(set(grades.values())) != len(grades):
+            raise ValueError("Each grade needs a different minimum score.")
+        if 0 not in grades.values():
+            # Otherwise totals below the lowest minimum would silently get
+            # that grade.
+            raise ValueError("The lowest grade must start at 0, e.g. \"F\": 0.")
+
+        self.name = name
+        self.grades = grades
+        self.max_total = max_total
+        ordered = sorted(grades.items(), key=lambda item: item[1])
+        self.letters = [letter for letter, _ in ordered]
+        self.table = np.zeros(max_total + 1, dtype=np.int8)
+        for code, (_, minimum) in enumerate(ordered):
+            self.table[minimum:] = code
+
+    def grade_codes(self, totals):
+        return self.table[np.clip(totals, 0, self.max_total)]
+
+    def grade(self, total):
+        return self.letters[self.table[min(max(total, 0), self.max_total)]]
+
+    def to_dict(self):
+        return {"name": self.name, "grades": self.grades}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("grades"), data.get("name", "Custom"))
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+DEFAULT_SCALE = GradeScale()
@@ -1,29 +1,46 @@
 from PyQt6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
-    QTableWidgetItem, QInputDialog, QMessageBox, QLineEdit, QComboBox, QLabel, QFileDialog
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
+    QAbstractItemView, QHeaderView, QInputDialog, QMessageBox, QLineEdit, QComboBox, QLabel, QFileDialog,
+    QProgressDialog, QCheckBox, QGroupBox, QApplication
 )
-from PyQt6.QtGui import QIcon, QTextDocument
-from PyQt6.QtPrintSupport import QPrinter
-from PyQt6.QtCore import Qt, QMarginsF, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeySequence, QShortcut
+import assets
 from student import Student
-import base64
-import json
-import csv
-import pathlib
+from student_repository import StudentRepository, normalize_id
+from settings import get_gradesys_path, load_settings, save_settings
+from grade_scale import GradeScale
+from assessment_schema import AssessmentSchema
+from background import BackgroundTask
+from csv_import import validate_csv, merge_csv_files
+from csv_export import export_students, EXPORT_FILTERS
+from score_sheet import render_score_sheet, paint_score_sheet
+from report_cards import (
+    card_path, write_card, logo_img_tag, select_records, generate_cards_task, CardCache
+)
+from storage import open_storage
 from add_student_dialog import AddStudentDialog
+from moderation import ModerationLog, reversal
+from moderation_dialog import ModerationDialog
+from paste_import import parse_paste
+from paste_dialog import PasteDialog
+from student_table_model import StudentTableModel, StudentFilterProxyModel
+from score_delegate import ScoreDelegate
 
 
 class StudentManagementSystem(QMainWindow):
 
     logout_requested = pyqtSignal()
+    SAVE_DELAY = 1500
+    ENTRY_BATCH = 25
     def __init__(self, username):
         super().__init__()
         self.username = username
         self.logout_requested.connect(self.handle_logout)
-        self.students = []
+        self.students = StudentRepository()
 
         self.setWindowTitle("Student Grading System")
-        self.setWindowIcon(QIcon("images/sms.png"))
+        self.setWindowIcon(assets.icon("sms.png"))
         self.setGeometry(100, 100, 900, 600)
 
         self.load_data()
@@ -60,7 +77,7 @@ class StudentManagementSystem(QMainWindow):
             QLabel {
                 font-weight: bold;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #ccc;
                 border-radius: 4px;
@@ -78,6 +95,11 @@ class StudentManagementSystem(QMainWindow):
         self.setCentralWidget(self.central_widget)
         layout = QVBoxLayout()
 
+        self.table_model = StudentTableModel(self.students, self)
+        self.proxy_model = StudentFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.table_model)
+        self.proxy_model.query_failed.connect(self.query_failed)
+
         # Top bar with username and logout
         top_layout = QHBoxLayout()
         user_label = QLabel(f"Logged in as: {self.username}")
@@ -92,39 +114,116 @@ class StudentManagementSystem(QMainWindow):
 
         # Search and filter
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search by name...")
+        self.search_input.setPlaceholderText("Search by name or ID...")
         search_btn = QPushButton("Search")
         search_btn.clicked.connect(self.refresh_table)
+        # Live search: re-filter once typing pauses, or straight away on
+        # Enter / the Search button.
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.refresh_table)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
+        self.search_input.returnPressed.connect(self.refresh_table)
+        self.fuzzy_check = QCheckBox("Fuzzy")
+        self.fuzzy_check.setToolTip("Tolerate spelling mistakes; best matches first")
+        self.fuzzy_check.toggled.connect(self.refresh_table)
 
         self.filter_combo = QComboBox()
-        self.filter_combo.addItem("All Grades")
+        self.filter_combo.addItem("All Grades", "All Grades")
         self.update_filter_options()
-        self.filter_combo.currentTextChanged.connect(self.refresh_table)
+        self.filter_combo.currentIndexChanged.connect(self.refresh_table)
 
         search_layout = QHBoxLayout()
         search_layout.addWidget(QLabel("Search:"))
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.fuzzy_check)
         search_layout.addWidget(search_btn)
         search_layout.addWidget(QLabel("Filter by Grade:"))
         search_layout.addWidget(self.filter_combo)
         layout.addLayout(search_layout)
 
+        # Class statistics, refreshed from the roster's running counters
+        # after every change (coalesced to once per event-loop pass).
+        stats_box = QGroupBox("Class Statistics")
+        stats_layout = QHBoxLayout()
+        self.stats_labels = {}
+        for key in ("Students", "Mean", "Min", "Max", "Median", "Quartiles", "Pass Rate", "Grades"):
+            label = QLabel()
+            label.setStyleSheet("font-weight: normal;")
+            self.stats_labels[key] = label
+            stats_layout.addWidget(label)
+        stats_layout.addStretch()
+        stats_box.setLayout(stats_layout)
+        layout.addWidget(stats_box)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setSingleShot(True)
+        self.stats_timer.setInterval(0)
+        self.stats_timer.timeout.connect(self.update_statistics)
+        for signal in (self.table_model.rowsInserted, self.table_model.rowsRemoved,
+                       self.table_model.dataChanged, self.table_model.modelReset):
+            signal.connect(lambda *args: self.stats_timer.start())
+        self.update_statistics()
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(["Name", "ID Number", "C.A", "Practical", "Exam", "Total", "Grade"])
+        self.table = QTableView()
+        self.table.setModel(self.proxy_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.table.setColumnWidth(0, 200)
+        # Clicking a header sorts by that column (see
+        # StudentFilterProxyModel.sort); start in roster order.
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        # Names and scores are edited in place: type over a cell, Enter
+        # moves down. Edits are saved in one batch once typing pauses for
+        # SAVE_DELAY ms, or straight away with Ctrl+S.
+        self.table.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked
+            | QAbstractItemView.EditTrigger.EditKeyPressed
+            | QAbstractItemView.EditTrigger.AnyKeyPressed
+        )
+        self.delegate = ScoreDelegate(self.table)
+        self.delegate.advance.connect(self.edit_next_row)
+        self.table.setItemDelegate(self.delegate)
+        self.pending_edits = set()
+        self.entry_dialog = None
+        self.queued_names = []
+        self.queued_ids = []
+        self.queued_scores = []
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY)
+        self.save_timer.timeout.connect(self.flush_edits)
+        self.table_model.edited.connect(self.cell_edited)
+        QShortcut(QKeySequence.StandardKey.Save, self, activated=self.flush_edits)
+        # Ctrl+V on the table pastes rows copied from a spreadsheet (a cell
+        # editor keeps Ctrl+V for itself).
+        QShortcut(
+            QKeySequence.StandardKey.Paste, self.table, activated=self.paste_rows,
+            context=Qt.ShortcutContext.WidgetWithChildrenShortcut,
+        )
         layout.addWidget(self.table)
 
         # Buttons
         button_layout = QHBoxLayout()
         for label, action in [
             ("Add Student", self.add_student),
+            ("Rapid Entry", self.rapid_entry),
             ("Update Student", self.update_student),
             ("Delete Student", self.delete_student),
+            ("Import CSV", self.import_csv),
+            ("Merge Scores", self.merge_scores),
+            ("Paste Rows", self.paste_rows),
+            ("Moderate", self.moderate_scores),
+            ("Undo Moderation", self.undo_moderation),
             ("Export to CSV", self.export_csv),
+            ("Grade Scale", self.load_grade_scale),
+            ("Assessment", self.load_assessment_schema),
             ("Print Scores Sheet", self.print_report_card),
-            ("Print Student", self.print_individual_card)
+            ("Print Student", self.print_individual_card),
+            ("Generate All Cards", self.generate_all_cards)
         ]:
             btn = QPushButton(label)
             btn.clicked.connect(action)
@@ -133,144 +232,486 @@ class StudentManagementSystem(QMainWindow):
         layout.addLayout(button_layout)
         self.central_widget.setLayout(layout)
         self.refresh_table()
+    def cell_edited(self, id_number):
+        self.pending_edits.add(id_number)
+        self.statusBar().showMessage(f"{len(self.pending_edits)} unsaved edits")
+        self.save_timer.start()
+
+    def flush_edits(self):
+        # One storage batch for every student edited since the last flush;
+        # students deleted in the meantime are already gone from storage.
+        self.save_timer.stop()
+        self.flush_entries()
+        if not self.pending_edits:
+            return
+        rows = self.students.rows_of(self.pending_edits)
+        self.pending_edits.clear()
+        self.storage.upsert_many(list(self.students.cohort.records_at(rows)))
+        self.statusBar().showMessage(f"Saved {len(rows)} edited students", 3000)
+
+    def edit_next_row(self):
+        index = self.table.currentIndex()
+        below = index.sibling(index.row() + 1, index.column())
+        if below.isValid():
+            self.table.setCurrentIndex(below)
+            self.table.edit(below)
+
+    def closeEvent(self, event):
+        self.flush_edits()
+        super().closeEvent(event)
+
     def logout(self):
         reply = QMessageBox.question(self, "Logout", "Are you sure you want to logout?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             self.logout_requested.emit()  # emit logout signal
     def handle_logout(self):
+        self.flush_edits()
+        self.storage.close()
         self.close()
 
 
     def refresh_table(self):
-        filter_grade = self.filter_combo.currentText()
-        search_text = self.search_input.text().strip().lower()
-        filtered = [
-            s for s in self.students
-            if (filter_grade == "All Grades" or s.grade == filter_grade) and
-               (search_text in s.name.lower())
-        ]
-        self.table.setRowCount(len(filtered))
-       
-        for row, student in enumerate(filtered):
-            name_item = QTableWidgetItem(student.name)
-            name_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 0, name_item)
-
-            for col, value in enumerate([
-                student.id_number,
-                str(student.ca),
-                str(student.practical),
-                str(student.exam),
-                str(student.total),
-                student.grade
-            ], start=1):
-                item = QTableWidgetItem(value)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, col, item)
+        self.search_timer.stop()
+        self.proxy_model.set_filter(
+            self.filter_combo.currentData(), self.search_input.text(), self.fuzzy_check.isChecked()
+        )
+
+    def selected_student(self):
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        id_number = self.proxy_model.index(index.row(), 1).data()
+        return self.students.get(id_number)
 
     def add_student(self):
-        dialog = AddStudentDialog()
+        schema = self.students.cohort.schema
+        dialog = AddStudentDialog(schema)
         if dialog.exec():
-            name, id_number, ca, practical, exam = dialog.get_student_data()
-            self.students.append(Student(name, id_number, ca, practical, exam))
-            self.save_data()
-
-    
-            self.update_filter_options()
-            self.refresh_table()
+            name, id_number, *scores = dialog.get_student_data()
+            student = Student(name, id_number, *scores, schema=schema)
+            try:
+                self.table_model.add_student(student)
+            except ValueError as e:
+                QMessageBox.warning(self, "Duplicate ID", str(e))
+                return
+            self.storage.upsert(student)
    
-    def update_student(self):
-        row = self.table.currentRow()
-        if row == -1:
-            QMessageBox.warning(self, "Warning", "Please select a student to update.")
+    def rapid_entry(self):
+        # One dialog, kept between sessions, that clears itself after every
+        # student. Entries queue up and reach the table and storage in
+        # batches (see queue_entry / flush_entries).
+        schema = self.students.cohort.schema
+        if self.entry_dialog is None or self.entry_dialog.schema != schema:
+            self.entry_dialog = AddStudentDialog(schema, on_entry=self.queue_entry)
+        self.entry_dialog.entered = 0
+        self.entry_dialog.reset_form()
+        self.entry_dialog.exec()
+        self.flush_entries()
+
+    def queue_entry(self, data):
+        name, id_number, *scores = data
+        key = normalize_id(id_number)
+        if key in self.students or key in self.queued_ids:
+            return f"A student with ID {key} already exists."
+        self.queued_names.append(name)
+        self.queued_ids.append(key)
+        self.queued_scores.append(scores)
+        if len(self.queued_ids) >= self.ENTRY_BATCH:
+            self.flush_entries()
+        else:
+            self.statusBar().showMessage(f"{len(self.queued_ids)} new students waiting to be saved")
+            self.save_timer.start()
+        return None
+
+    def flush_entries(self):
+        if not self.queued_ids:
             return
+        start, stop = self.table_model.add_students(self.queued_names, self.queued_ids, self.queued_scores)
+        self.storage.upsert_many(self.students.records(start, stop))
+        self.queued_names, self.queued_ids, self.queued_scores = [], [], []
+        self.statusBar().showMessage(f"Added {stop - start} students", 3000)
 
-        id_number = self.table.item(row, 1).text()
-        student = next((s for s in self.students if s.id_number == id_number), None)
-        if not student:
+    def update_student(self):
+        student = self.selected_student()
+        if student is None:
+            QMessageBox.warning(self, "Warning", "Please select a student to update.")
             return
 
         # Keep ID uneditable
         QMessageBox.information(self, "Info", f"Editing student with ID: {student.id_number}")
 
-        name, ok1 = QInputDialog.getText(self, "Update Name", "New Name:", text=student.name)
-        ca, ok2 = QInputDialog.getInt(self, "Update C.A", "New C.A (0-30):", student.ca, 0, 30)
-        practical, ok3 = QInputDialog.getInt(self, "Update Practical", "New Practical (0-20):", student.practical, 0, 20)
-        exam, ok4 = QInputDialog.getInt(self, "Update Exam", "New Exam (0-50):", student.exam, 0, 50)
+        name, ok = QInputDialog.getText(self, "Update Name", "New Name:", text=student.name)
+        if not ok:
+            return
+        schema = self.students.cohort.schema
+        scores = []
+        for key, label, maximum in zip(schema.keys, schema.labels, schema.maxima.tolist()):
+            score, ok = QInputDialog.getInt(
+                self, f"Update {label}", f"New {label} (0-{maximum}):", student.score(key), 0, maximum
+            )
+            if not ok:
+                return
+            scores.append(score)
 
-        if all([ok1, ok2, ok3, ok4]):
-            student.name = name
-            student.ca = ca
-            student.practical = practical
-            student.exam = exam
-            student.total = ca + practical + exam
-            student.grade = student.calculate_grade()
-            self.save_data()
-            self.update_filter_options()
-            self.refresh_table()
+        self.table_model.update_student(student.id_number, name, scores)
+        self.storage.upsert(student)
 
 
     def delete_student(self):
-        row = self.table.currentRow()
-        if row == -1:
+        student = self.selected_student()
+        if student is None:
             QMessageBox.warning(self, "Warning", "Please select a student to delete.")
             return
 
-        id_number = self.table.item(row, 1).text()
-        student = next((s for s in self.students if s.id_number == id_number), None)
-        if not student:
-            return
-
+        id_number = student.id_number
         confirm = QMessageBox.question(self, "Confirm", f"Delete student with ID: {id_number}?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if confirm == QMessageBox.StandardButton.Yes:
-            self.students = [s for s in self.students if s.id_number != id_number]
-            self.save_data()
-            self.update_filter_options()
-            self.refresh_table()
+            self.table.clearSelection()
+            self.table_model.remove_student(id_number)
+            self.storage.delete(id_number)
 
 
     
     def export_csv(self):
-        csv_path = self.get_gradesys_path() / "students.csv"
-        with open(csv_path, "w", newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Name", "ID Number", "CA", "Practical", "Exam", "Total", "Grade"])
-            for s in self.students:
-                writer.writerow([s.name, s.id_number, s.ca, s.practical, s.exam, s.total, s.grade])
-        QMessageBox.information(self, "Exported", f"Students exported to: {csv_path}")
-
-    def update_filter_options(self):
-        current = self.filter_combo.currentText()
+        default_path = str(get_gradesys_path() / "students.csv")
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Students", default_path, EXPORT_FILTERS)
+        if not filename:
+            return
+
+        self.export_progress = QProgressDialog("Exporting students...", "Cancel", 0, max(len(self.students), 1), self)
+        self.export_progress.setWindowTitle("Export")
+        self.export_progress.setMinimumDuration(0)
+        self.export_task = BackgroundTask(export_students, self.students.cohort.snapshot(), filename)
+        self.export_task.signals.progress.connect(lambda done, total: self.export_progress.setValue(done))
+        self.export_task.signals.finished.connect(self.finish_export)
+        self.export_task.signals.failed.connect(self.export_failed)
+        self.export_task.signals.cancelled.connect(self.export_progress.close)
+        self.export_progress.canceled.connect(self.export_task.cancel)
+        self.export_task.start()
+
+    def finish_export(self, file_path):
+        self.export_progress.close()
+        QMessageBox.information(self, "Exported", f"Students exported to: {file_path}")
+
+    def export_failed(self, message):
+        self.export_progress.close()
+        QMessageBox.warning(self, "Export Failed", message)
+
+    def import_csv(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Import CSV", "", "CSV Files (*.csv)")
+        if not filename:
+            return
+
+        self.import_progress = QProgressDialog("Reading and validating scores...", "Cancel", 0, 100, self)
+        self.import_progress.setWindowTitle("Import CSV")
+        self.import_progress.setMinimumDuration(0)
+        self.import_task = BackgroundTask(
+            validate_csv, filename, list(self.students.cohort.ids), self.students.cohort.schema
+        )
+        self.import_task.signals.progress.connect(
+            lambda done, total: self.import_progress.setValue(int(100 * done / total) if total else 100)
+        )
+        self.import_task.signals.finished.connect(self.finish_csv_import)
+        self.import_task.signals.failed.connect(self.csv_import_failed)
+        self.import_task.signals.cancelled.connect(self.import_progress.close)
+        self.import_progress.canceled.connect(self.import_task.cancel)
+        self.import_task.start()
+
+    def csv_import_failed(self, message):
+        self.import_progress.close()
+        QMessageBox.warning(self, "Import Failed", message)
+
+    def finish_csv_import(self, result):
+        self.import_progress.close()
+
+        # Students added while the file was being validated win over the file.
+        keep = [id_number not in self.students for id_number in result.ids]
+        if not all(keep):
+            result.errors.extend(
+                (0, f"Duplicate ID {id_number}.") for id_number, ok in zip(result.ids, keep) if not ok
+            )
+            result.names = [n for n, ok in zip(result.names, keep) if ok]
+            result.scores = [s for s, ok in zip(result.scores, keep) if ok]
+            result.ids = [i for i, ok in zip(result.ids, keep) if ok]
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Import CSV")
+        box.setText(
+            f"{result.rows_read} rows read: {len(result)} valid, {len(result.errors)} with errors."
+        )
+        if result.errors:
+            lines = [f"Line {line}: {message}" if line else message for line, message in result.errors[:500]]
+            if len(result.errors) > 500:
+                lines.append(f"... and {len(result.errors) - 500} more.")
+            box.setDetailedText("\n".join(lines))
+        if not len(result):
+            box.setIcon(QMessageBox.Icon.Warning)
+            box.exec()
+            return
+        box.setInformativeText(f"Import {len(result)} students?")
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if box.exec() != QMessageBox.StandardButton.Yes:
+            return
+
+        start, stop = self.table_model.add_students(result.names, result.ids, result.scores)
+        self.storage.upsert_many(self.students.records(start, stop))
+
+    def merge_scores(self):
+        filenames, _ = QFileDialog.getOpenFileNames(self, "Merge Score Sheets", "", "CSV Files (*.csv)")
+        if not filenames:
+            return
+
+        self.import_progress = QProgressDialog("Joining score sheets...", "Cancel", 0, 100, self)
+        self.import_progress.setWindowTitle("Merge Scores")
+        self.import_progress.setMinimumDuration(0)
+        self.import_task = BackgroundTask(merge_csv_files, filenames, self.students.cohort.schema)
+        self.import_task.signals.progress.connect(
+            lambda done, total: self.import_progress.setValue(int(100 * done / total) if total else 100)
+        )
+        self.import_task.signals.finished.connect(self.finish_score_merge)
+        self.import_task.signals.failed.connect(self.csv_import_failed)
+        self.import_task.signals.cancelled.connect(self.import_progress.close)
+        self.import_progress.canceled.connect(self.import_task.cancel)
+        self.import_task.start()
+
+    def finish_score_merge(self, result):
+        self.import_progress.close()
+        result.resolve(self.students)
+        updates = len(result.update_rows)
+        inserts = len(result.new_ids)
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Merge Scores")
+        box.setText(
+            f"{result.rows_read} rows read: {updates} students to update, {inserts} to add, "
+            f"{len(result.conflicts)} conflicts, {len(result.errors)} errors."
+        )
+        lines = [f"Conflict for {id_number}: {message}" for id_number, message in result.conflicts]
+        lines += [f"{id_number} has no {components} score; 0 will be used." for id_number, components in result.missing]
+        lines += [
+            f"{file_name} line {line}: {message}" if line else message
+            for file_name, line, message in result.errors
+        ]
+        if lines:
+            if len(lines) > 500:
+                lines = lines[:500] + [f"... and {len(lines) - 500} more."]
+            box.setDetailedText("\n".join(lines))
+        if not updates and not inserts:
+            box.setIcon(QMessageBox.Icon.Warning)
+            box.exec()
+            return
+        box.setInformativeText("Apply the merged scores?")
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if box.exec() != QMessageBox.StandardButton.Yes:
+            return
+
+        self.table_model.update_scores(result.update_rows, result.update_scores)
+        start, stop = self.table_model.add_students(result.new_names, result.new_ids, result.new_scores)
+        records = [self.students.at(int(row)).to_dict() for row in result.update_rows]
+        records.extend(self.students.records(start, stop))
+        self.storage.upsert_many(records)
+
+    def paste_rows(self):
+        text = QApplication.clipboard().text()
+        if not text.strip():
+            QMessageBox.information(self, "Paste Scores", "The clipboard has no rows to paste.")
+            return
+        self.flush_edits()
+        result = parse_paste(text, self.students)
+        dialog = PasteDialog(result, self.students.cohort, self)
+        if not dialog.exec():
+            return
+
+        # One batch for the table and one for storage.
+        self.table_model.update_scores(result.update_rows, result.update_scores)
+        start, stop = self.table_model.add_students(result.new_names, result.new_ids, result.new_scores)
+        records = list(self.students.cohort.records_at(result.update_rows))
+        records.extend(self.students.records(start, stop))
+        self.storage.upsert_many(records)
+        self.statusBar().showMessage(
+            f"Pasted {stop - start} new students and {len(result.update_rows)} updates", 3000
+        )
+
+    def filter_scope(self):
+        # Human-readable description of the students the table shows.
+        proxy = self.proxy_model
+        parts = []
+        if proxy.grade != "All Grades":
+            parts.append(f"grade {proxy.grade}")
+        if proxy.fuzzy:
+            parts.append(f"best {proxy.FUZZY_LIMIT} fuzzy matches for '{proxy.search_text}'")
+        elif proxy.search_text:
+            parts.append(f"matching '{proxy.search_text}'")
+        return ", ".join(parts) or "all students"
+
+    def query_failed(self, message):
+        QMessageBox.warning(self, "Filter Failed", f"The table could not be updated: {message}")
+
+    def moderate_scores(self):
+        # Applies to the students the table currently shows (filter and
+        # search), as one vectorized update and one storage batch. A query
+        # still running would leave rows on the previous filter while the
+        # scope already names the new one, so settle it first.
+        self.refresh_table()
+        if not self.proxy_model.settle():
+            return
+        rows = self.proxy_model.rows.copy()
+        if not len(rows):
+            QMessageBox.warning(self, "Moderate Scores", "No students match the current filter.")
+            return
+        scope = self.filter_scope()
+        dialog = ModerationDialog(self.students.cohort, rows, scope, self)
+        if not dialog.exec() or not len(dialog.plan):
+            return
+        plan = dialog.plan
+        self.table_model.update_scores(plan.rows, plan.new_scores)
+        self.storage.upsert_many(list(self.students.cohort.records_at(plan.rows)))
+        entry = self.moderation_log.record(plan, scope)
+        QMessageBox.information(
+            self, "Moderate Scores",
+            f"{plan.description()}: {len(plan)} scores changed, {plan.regraded} grades changed.\n"
+            f"Logged as moderation #{entry['id']}; use Undo Moderation to reverse it.",
+        )
+
+    def undo_moderation(self):
+        entries = self.moderation_log.reversible()
+        if not entries:
+            QMessageBox.information(self, "Undo Moderation", "There is no moderation to undo.")
+            return
+        items = [
+            f"#{e['id']} {e['time']}: {e['description']} ({len(e['changes'])} students, {e['scope']})"
+            for e in entries
+        ]
+        choice, ok = QInputDialog.getItem(self, "Undo Moderation", "Moderation to reverse:", items, 0, False)
+        if not ok:
+            return
+        entry = entries[items.index(choice)]
+        try:
+            rows, scores, skipped = reversal(self.students, entry)
+        except ValueError as e:
+            QMessageBox.warning(self, "Undo Moderation", str(e))
+            return
+        if len(rows):
+            self.table_model.update_scores(rows, scores)
+            self.storage.upsert_many(list(self.students.cohort.records_at(rows)))
+        self.moderation_log.mark_reverted(entry, len(rows), skipped)
+        message = f"Moderation #{entry['id']} reversed for {len(rows)} students."
+        if skipped:
+            message += (
+                f"\n{len(skipped)} left unchanged (removed from the roster or edited since): "
+                + ", ".join(skipped[:20]) + ("..." if len(skipped) > 20 else "")
+            )
+        QMessageBox.information(self, "Undo Moderation", message)
+
+    def update_filter_options(self, stats=None):
+        # One entry per grade that has students, with its count.
+        if stats is None:
+            stats = self.students.statistics()
+        current = self.filter_combo.currentData()
+        self.filter_combo.blockSignals(True)
         self.filter_combo.clear()
-        self.filter_combo.addItem("All Grades")
-        grades = sorted(set(s.grade for s in self.students))
-        self.filter_combo.addItems(grades)
-        self.filter_combo.setCurrentText(current)
-    
-    def get_gradesys_path(self):
-        documents_dir = pathlib.Path.home() / "Documents"
-        gradesys_dir = documents_dir / "GradeSys"
-        gradesys_dir.mkdir(parents=True, exist_ok=True)
-        return gradesys_dir
+        self.filter_combo.addItem(f"All Grades ({stats['count']})", "All Grades")
+        for grade in self.students.grades():
+            self.filter_combo.addItem(f"{grade} ({stats['grade_counts'][grade]})", grade)
+        self.filter_combo.setCurrentIndex(max(self.filter_combo.findData(current), 0))
+        self.filter_combo.blockSignals(False)
+        self.refresh_table()
 
+    def update_statistics(self):
+        stats = self.students.statistics()
+        labels = self.stats_labels
+        labels["Students"].setText(f"Students: {stats['count']}")
+        if stats["count"]:
+            low, median, high = self.students.quantiles((0.25, 0.5, 0.75))
+            labels["Mean"].setText(f"Mean: {stats['mean']:.1f}")
+            labels["Min"].setText(f"Min: {stats['min']}")
+            labels["Max"].setText(f"Max: {stats['max']}")
+            labels["Median"].setText(f"Median: {median:g}")
+            labels["Quartiles"].setText(f"Q1–Q3: {low:g}–{high:g}")
+            labels["Pass Rate"].setText(f"Pass Rate: {stats['pass_rate']:.1%}")
+        else:
+            for key in ("Mean", "Min", "Max", "Median", "Quartiles", "Pass Rate"):
+                labels[key].setText(f"{key}: –")
+        counts = stats["grade_counts"]
+        labels["Grades"].setText("  ".join(f"{grade}: {counts[grade]}" for grade in reversed(list(counts))))
+        self.update_filter_options(stats)
+    
     def save_data(self):
-        file_path = self.get_gradesys_path() /  "students.json"
-        with open(file_path, "w") as f:
-            json.dump([s.__dict__ for s in self.students], f, indent=4)
+        cohort = self.students.cohort
+        self.storage.save_all(cohort.records_at(cohort.roster_order()))
+
+    def load_grade_scale(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Load Grade Scale", "", "Grade Scale (*.json)")
+        if not filename:
+            return
+        try:
+            scale = GradeScale.from_file(filename)
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            QMessageBox.warning(self, "Invalid Grade Scale", str(e))
+            return
+
+        settings = load_settings()
+        settings["grade_scale"] = scale.to_dict()
+        save_settings(settings)
+
+        self.students.set_scale(scale)
+        self.table_model.rows_changed()
+        self.save_data()
+        QMessageBox.information(self, "Grade Scale", f"Students regraded with the {scale.name} scale.")
+
+    def load_assessment_schema(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Load Assessment Schema", "", "Assessment Schema (*.json)")
+        if not filename:
+            return
+        try:
+            schema = AssessmentSchema.from_file(filename)
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            QMessageBox.warning(self, "Invalid Assessment Schema", str(e))
+            return
+
+        current = self.students.cohort.schema
+        dropped = [label for key, label in zip(current.keys, current.labels) if key not in schema.keys]
+        if dropped:
+            confirm = QMessageBox.question(
+                self, "Assessment Schema",
+                f"Scores for {', '.join(dropped)} are not part of {schema.name} and will be removed. Continue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if confirm != QMessageBox.StandardButton.Yes:
+                return
+
+        settings = load_settings()
+        settings["assessment_schema"] = schema.to_dict()
+        save_settings(settings)
+
+        # One vectorized recompute of every total and grade, then a single
+        # batch write.
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        capped = self.table_model.set_schema(schema)
+        self.storage.set_schema(schema)
+        self.save_data()
+        message = f"Students regraded with the {schema.name} assessment."
+        if capped:
+            message += f"\n{capped} scores were above their new maximum and were capped."
+        QMessageBox.information(self, "Assessment Schema", message)
 
     def load_data(self):
-        file_path = self.get_gradesys_path() / "students.json"
-        if file_path.exists():
-            with open(file_path, "r") as f:
-                for item in json.load(f):
-                    name = item.get("name")
-                    id_number = item.get("id_number", "")
-                    ca = item.get("ca", 0)
-                    practical = item.get("practical", 0)
-                    exam = item.get("exam", 0)
-                    self.students.append(Student(name, id_number, ca, practical, exam))
+        settings = load_settings()
+        self.pdf_renderer = settings["pdf_renderer"]
+        if settings["grade_scale"]:
+            try:
+                self.students.set_scale(GradeScale.from_dict(settings["grade_scale"]))
+            except (ValueError, AttributeError, TypeError) as e:
+                # A scale saved before it would be rejected; grade with the
+                # default one until a valid scale is loaded.
+                QMessageBox.warning(self, "Invalid Grade Scale", f"Using the default grade scale. {e}")
+        if settings["assessment_schema"]:
+            self.students.set_schema(AssessmentSchema.from_dict(settings["assessment_schema"]))
+        self.storage = open_storage(get_gradesys_path(), settings["storage"], self.students.cohort.schema)
+        self.moderation_log = ModerationLog(get_gradesys_path() / "moderation_log.jsonl")
+        self.students.load(self.storage.load())
     
     
     def print_report_card(self):
@@ -278,180 +719,110 @@ class StudentManagementSystem(QMainWindow):
             QMessageBox.warning(self, "Warning", "No student data to print.")
             return
 
-        
-        try:
-            with open("images/mau.png", "rb") as image_file:
-                encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-                img_tag = f'<img src="data:image/png;base64,{encoded_image}" alt="Logo" style="height: 80px;" />'
-        except FileNotFoundError:
-            img_tag = "<!-- Logo not found -->"
-
-        html = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: 'Segoe UI'; font-size: 12pt; }}
-                    h1,h2 {{ text-align: center; color: #2f80ed; margin:0px; line-height:0px; }}
-                    h3 {{ text-align: center; margin:0px; line-height:0px; }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-top: 20px;
-                    }}
-                    th, td {{
-                        border: 1px solid #444;
-                        padding: 8px;
-                        text-align: center;
-                    }}
-                    th {{
-                        background-color: #f0f0f0;
-                    }}
-                    .id-column {{
-                        width: 180px;
-                        white-space: nowrap;
-                        font-size: 11pt;
-                    }}
-                    .s_name {{
-                        text-align:left !important;
-                        white-space: nowrap;  
-                        font-size: 11pt;
-                        min-width: 20%;     
-                    }}
-                </style>
-            </head>
-            <body>
-                <div style="text-align: center; margin-bottom: 10px;">
-                    {img_tag}
-                </div>
-                <h1>MODIBBO ADAMA UNIVERSITY YOLA</h1>
-                <h2>DEPARTMENT OF COMPUTER SCIENCE</h2>
-                <h3>CSC201: INTRODUCTION TO PROGRAMING USING PYTHON SCORES SHEET</h3>
-                <table>
-                    <tr>
-                        <th>Student Name</th>
-                        <th class="id_number">ID Number</th>
-                        <th>C.A</th>
-                        <th>Practical</th>
-                        <th>Exam</th>
-                        <th>Total</th>
-                        <th>Grade</th>
-                    </tr>
-        """
-
-        for s in self.students:
-            html += f"""
-                <tr>
-                    <td class="s_name">{s.name}</td>
-                    <td>{s.id_number}</td>
-                    <td>{s.ca}</td>
-                    <td>{s.practical}</td>
-                    <td>{s.exam}</td>
-                    <td>{s.total}</td>
-                    <td>{s.grade}</td>
-                </tr>
-            """
-
-        html += """
-                </table>
-            </body>
-        </html>
-        """
-
         filename, _ = QFileDialog.getSaveFileName(self, "Save PDF", "", "PDF Files (*.pdf)")
         if not filename:
             return
         if not filename.endswith(".pdf"):
             filename += ".pdf"
 
-        document = QTextDocument()
-        document.setHtml(html)
-        printer = QPrinter()
-        printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-        printer.setOutputFileName(filename)
-        
-        printer.setPageMargins(QMarginsF(1, 0, 5, 1))
-        document.print(printer)
-
+        self.sheet_progress = QProgressDialog("Rendering score sheet...", "Cancel", 0, 100, self)
+        self.sheet_progress.setWindowTitle("Print Scores Sheet")
+        self.sheet_progress.setMinimumDuration(0)
+        snapshot = self.students.cohort.snapshot()
+        # The whole roster, in the order the table is sorted by.
+        rows = snapshot.roster_order()
+        if self.proxy_model.sort_field is not None:
+            rows = self.students.sort_rows(rows, self.proxy_model.sort_field, self.proxy_model.descending)
+        if self.pdf_renderer == "painter":
+            self.sheet_task = BackgroundTask(paint_score_sheet, snapshot, filename, rows)
+        else:
+            self.sheet_task = BackgroundTask(render_score_sheet, snapshot, filename, logo_img_tag(), rows)
+        self.sheet_task.signals.progress.connect(
+            lambda done, total: self.sheet_progress.setValue(int(100 * done / total) if total else 100)
+        )
+        self.sheet_task.signals.finished.connect(self.finish_report_card)
+        self.sheet_task.signals.failed.connect(self.report_card_failed)
+        self.sheet_task.signals.cancelled.connect(self.sheet_progress.close)
+        self.sheet_progress.canceled.connect(self.sheet_task.cancel)
+        self.sheet_task.start()
+
+    def finish_report_card(self, filename):
+        self.sheet_progress.close()
         QMessageBox.information(self, "Success", f"PDF report saved as {filename}")
+
+    def report_card_failed(self, message):
+        self.sheet_progress.close()
+        QMessageBox.warning(self, "Print Failed", message)
+
     def print_individual_card(self):
-        row = self.table.currentRow()
-        if row == -1:
+        student = self.selected_student()
+        if student is None:
             QMessageBox.warning(self, "Warning", "Please select a student to print.")
             return
 
-        name = self.table.item(row, 0).text()
-        student = next((s for s in self.students if s.name == name), None)
-        if not student:
-            QMessageBox.warning(self, "Warning", "Student not found.")
-            return
-
-        try:
-            with open("images/mau.png", "rb") as image_file:
-                encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-                img_tag = f'<img src="data:image/png;base64,{encoded_image}" alt="Logo" style="height: 80px;" />'
-        except FileNotFoundError:
-            img_tag = "<!-- Logo not found -->"
-
-        html = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: 'Segoe UI'; font-size: 12pt; }}
-                    h1,h2 {{ text-align: center; color: #2f80ed; margin:0px; line-height:0px; }}
-                    h3 {{ text-align: center; margin:0px; line-height:0px; }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-top: 20px;
-                    }}
-                    th, td {{
-                        border: 1px solid #444;
-                        padding: 8px;
-                        text-align: center;
-                    }}
-                    th {{
-                        background-color: #f0f0f0;
-                    }}
-                    .s_name {{
-                        text-align:left !important;
-                        white-space: nowrap;  
-                        font-size: 11pt;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div style="text-align: center; margin-bottom: 10px;">
-                    {img_tag}
-                </div>
-                <h1>MODIBBO ADAMA UNIVERSITY YOLA</h1>
-                <h2>DEPARTMENT OF COMPUTER SCIENCE</h2>
-                <h3>CSC201: INTRODUCTION TO PROGRAMMING USING PYTHON</h3>
-                <table>
-                    <tr><th>Student Name</th><td class="s_name">{student.name}</td></tr>
-                    <tr><th>ID Number</th><td>{student.id_number}</td></tr>
-                    <tr><th>C.A</th><td>{student.ca}</td></tr>
-                    <tr><th>Practical</th><td>{student.practical}</td></tr>
-                    <tr><th>Exam</th><td>{student.exam}</td></tr>
-                    <tr><th>Total</th><td>{student.total}</td></tr>
-                    <tr><th>Grade</th><td>{student.grade}</td></tr>
-                </table>
-            </body>
-        </html>
-        """
-
-        safe_id = "".join(c for c in student.id_number if c.isalnum() or c in ('-', '_'))
-        output_dir = self.get_gradesys_path() / "individual_cards"
+        output_dir = get_gradesys_path() / "individual_cards"
         output_dir.mkdir(parents=True, exist_ok=True)
-        file_path = output_dir / f"{safe_id}.pdf"
-
-        document = QTextDocument()
-        document.setHtml(html)
-        printer = QPrinter()
-        printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-        printer.setOutputFileName(str(file_path))
-        printer.setPageMargins(QMarginsF(1, 0, 5, 1))
-        document.print(printer)
+        file_path = card_path(output_dir, student.id_number)
+        record = student.to_dict()
+        schema = self.students.cohort.schema
+        cache = CardCache(output_dir, self.students.cohort.scale, self.pdf_renderer, schema)
+        if not cache.is_fresh(record):
+            write_card(record, file_path, self.pdf_renderer, schema)
+            cache.mark([record])
+            cache.save()
 
         QMessageBox.information(self, "Success", f"Report card saved as: {file_path}")
 
+    def generate_all_cards(self):
+        options = ["All Students"] + self.students.grades() + ["ID List..."]
+        choice, ok = QInputDialog.getItem(self, "Generate Report Cards", "Generate cards for:", options, 0, False)
+        if not ok:
+            return
+        if choice == "All Students":
+            records, unknown = select_records(self.students)
+        elif choice == "ID List...":
+            text, ok = QInputDialog.getMultiLineText(self, "Generate Report Cards", "ID numbers (one per line):")
+            if not ok:
+                return
+            ids = [i.strip() for i in text.replace(",", "\n").splitlines() if i.strip()]
+            records, unknown = select_records(self.students, ids=ids)
+        else:
+            records, unknown = select_records(self.students, grades=[choice])
+        if unknown:
+            QMessageBox.warning(self, "Unknown IDs", "Not on the roster:\n" + "\n".join(unknown))
+        if not records:
+            return
 
+        output_dir = get_gradesys_path() / "individual_cards"
+        self.cards_progress = QProgressDialog("Generating report cards...", "Cancel", 0, len(records), self)
+        self.cards_progress.setWindowTitle("Report Cards")
+        self.cards_progress.setMinimumDuration(0)
+        self.cards_task = BackgroundTask(
+            generate_cards_task, records, output_dir, self.students.cohort.scale, self.pdf_renderer,
+            self.students.cohort.schema,
+        )
+        self.cards_task.signals.progress.connect(
+            lambda done, total: (self.cards_progress.setMaximum(max(total, 1)), self.cards_progress.setValue(done))
+        )
+        self.cards_task.signals.finished.connect(lambda result: self.finish_cards(result, output_dir))
+        self.cards_task.signals.failed.connect(self.cards_failed)
+        self.cards_task.signals.cancelled.connect(self.cards_progress.close)
+        self.cards_progress.canceled.connect(self.cards_task.cancel)
+        self.cards_task.start()
+
+    def finish_cards(self, result, output_dir):
+        self.cards_progress.close()
+        rendered, skipped, failures = result
+        summary = f"{rendered} report cards saved, {skipped} already up to date, in {output_dir}"
+        if failures:
+            QMessageBox.warning(
+                self, "Report Cards",
+                f"{summary}\n{len(failures)} failed:\n"
+                + "\n".join(f"{id_number}: {message}" for id_number, message in failures[:20])
+            )
+        else:
+            QMessageBox.information(self, "Report Cards", summary)
+
+    def cards_failed(self, message):
+        self.cards_progress.close()
+        QMessageBox.warning(self, "Report Cards", message)
@@ -1,4 +1,5 @@
 from PyQt6.QtCore import QTimer
+import multiprocessing
 import sys
 from welcome import SplashScreen
 from grader import StudentManagementSystem
@@ -19,6 +20,9 @@ def run_login_flow():
         sys.exit()
 
 if __name__ == "__main__":
+    # Report card generation uses worker processes, which a frozen .exe
+    # must be able to start.
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
@@ -6,9 +6,11 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton,
     QMessageBox, QFormLayout, QHBoxLayout, QSpacerItem, QSizePolicy
 )
-from PyQt6.QtGui import QFont, QIcon
+from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt, QTimer
 
+import assets
+
 from register_dialog import RegisterDialog
 from reset_dialog import ResetDialog
 
@@ -18,7 +20,7 @@ class LoginDialog(QDialog):
         super().__init__()
         self.setWindowTitle("Login")
         self.setFixedSize(350, 300)
-        self.setWindowIcon(QIcon("images/login.png"))
+        self.setWindowIcon(assets.icon("login.png"))
         self.USER_FILE = self.get_gradesys_path() / "users.json"
         self.logged_in_user = None
         self.failed_attempts = 0
@@ -0,0 +1,161 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+
+# Operation key -> label. Every operation works on one component of a set
+# of rows; results are rounded half up and kept within 0..maximum.
+OPERATIONS = {
+    "add": "Add marks",
+    "scale": "Multiply by",
+    "cap": "Cap at",
+}
+
+
+def moderate(scores, maximum, operation, amount):
+    scores = scores.astype(np.float64)
+    if operation == "add":
+        result = scores + amount
+    elif operation == "scale":
+        result = scores * amount
+    elif operation == "cap":
+        result = np.minimum(scores, amount)
+    else:
+        raise ValueError(f"Unknown moderation operation: {operation}")
+    return np.clip(np.floor(result + 0.5 + 1e-9), 0, maximum).astype(np.int16)
+
+
+def describe(component_label, operation, amount):
+    return f"{OPERATIONS[operation]} {amount:g} on {component_label}"
+
+
+class ModerationPlan:
+    # One moderation worked out against the roster without touching it:
+    # the rows whose score actually changes, their old and new score rows,
+    # and the grade distribution before and after. Applying it is a single
+    # StudentTableModel.update_scores call.
+    def __init__(self, cohort, rows, key, operation, amount):
+        schema = cohort.schema
+        self.key = key
+        self.label = schema.labels[schema.keys.index(key)]
+        self.operation = operation
+        self.amount = amount
+        self.selected = len(rows)
+        self.column = column = schema.keys.index(key)
+        rows = np.asarray(rows, dtype=np.int64)
+        old_scores = cohort.scores[rows]
+        new_column = moderate(old_scores[:, column], int(schema.maxima[column]), operation, amount)
+        changed = new_column != old_scores[:, column]
+        self.rows = rows[changed]
+        self.old_scores = old_scores[changed]
+        self.new_scores = self.old_scores.copy()
+        self.new_scores[:, column] = new_column[changed]
+        self.ids = [cohort.ids[row] for row in self.rows.tolist()]
+
+        # Students per grade across the whole roster, before and after.
+        letters = len(cohort.scale.letters)
+        old_codes = cohort.grade_codes[self.rows]
+        new_codes = cohort.scale.grade_codes(schema.totals(self.new_scores).astype(np.int64))
+        self.before = cohort.grade_counts()
+        self.after = (
+            self.before
+            - np.bincount(old_codes, minlength=letters)
+            + np.bincount(new_codes, minlength=letters)
+        )
+        self.regraded = int((old_codes != new_codes).sum())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def description(self):
+        return describe(self.label, self.operation, self.amount)
+
+    def distribution(self, letters):
+        # [(letter, before, after)], best grade first.
+        return [
+            (letter, int(before), int(after))
+            for letter, before, after in reversed(list(zip(letters, self.before, self.after)))
+        ]
+
+
+class ModerationLog:
+    # Append-only JSON Lines record of applied moderations, each with the
+    # old and new score of every student it changed, so any of them can be
+    # reversed later. Reversals are logged too.
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def entries(self):
+        if not self.file_path.exists():
+            return []
+        entries = []
+        with open(self.file_path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def append(self, entry):
+        with open(self.file_path, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, plan, scope):
+        # scope describes which students were selected (the table filter).
+        entry = {
+            "op": "moderate",
+            "id": max((e.get("id", 0) for e in self.entries()), default=0) + 1,
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "component": plan.key,
+            "operation": plan.operation,
+            "amount": plan.amount,
+            "description": plan.description(),
+            "scope": scope,
+            "changes": dict(zip(
+                plan.ids,
+                zip(plan.old_scores[:, plan.column].tolist(), plan.new_scores[:, plan.column].tolist()),
+            )),
+        }
+        self.append(entry)
+        return entry
+
+    def reversible(self):
+        # Applied moderations not yet reversed, newest first.
+        entries = self.entries()
+        reverted = {entry["of"] for entry in entries if entry.get("op") == "revert"}
+        return [e for e in reversed(entries) if e.get("op") == "moderate" and e["id"] not in reverted]
+
+    def mark_reverted(self, entry, restored, skipped):
+        self.append({
+            "op": "revert",
+            "of": entry["id"],
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "restored": restored,
+            "skipped": skipped,
+        })
+
+
+def reversal(repository, entry):
+    # Works out how to undo a logged moderation: (rows, scores, skipped)
+    # where scores are the full score rows to write back. Students who
+    # have left the roster, or whose score has been changed again since,
+    # are skipped (by ID) rather than overwritten.
+    cohort = repository.cohort
+    schema = cohort.schema
+    if entry["component"] not in schema.keys:
+        raise ValueError(f"{entry['component']} is not part of the current assessment.")
+    column = schema.keys.index(entry["component"])
+    ids = list(entry["changes"])
+    old, new = np.array(list(entry["changes"].values()), dtype=np.int64).reshape(len(ids), 2).T
+    rows = np.array([repository.row_of(id_number) for id_number in ids], dtype=np.int64)
+    ok = rows != -1
+    ok[ok] = cohort.scores[rows[ok], column] == new[ok]
+    scores = cohort.scores[rows[ok]].copy()
+    scores[:, column] = old[ok]
+    skipped = [id_number for id_number, keep in zip(ids, ok.tolist()) if not keep]
+    return rows[ok], scores, skipped
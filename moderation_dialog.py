@@ -0,0 +1,80 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QLabel, QComboBox, QDoubleSpinBox, QTableWidget,
+    QTableWidgetItem, QHeaderView, QDialogButtonBox, QAbstractItemView
+)
+from PyQt6.QtCore import Qt
+
+from moderation import OPERATIONS, ModerationPlan
+
+
+class ModerationDialog(QDialog):
+    # Picks a component, an operation and an amount for the students in
+    # rows, and previews the grade distribution it would produce. The plan
+    # is recomputed (one vectorized pass) whenever an input changes;
+    # self.plan is what the caller applies on accept.
+    def __init__(self, cohort, rows, scope, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Moderate Scores")
+        self.setMinimumWidth(420)
+        self.cohort = cohort
+        self.rows = rows
+        self.plan = None
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{len(rows)} students selected ({scope})."))
+
+        form = QFormLayout()
+        self.component_combo = QComboBox()
+        for key, label, maximum in zip(cohort.schema.keys, cohort.schema.labels, cohort.schema.maxima.tolist()):
+            self.component_combo.addItem(f"{label} (0-{maximum})", key)
+        self.operation_combo = QComboBox()
+        for operation, label in OPERATIONS.items():
+            self.operation_combo.addItem(label, operation)
+        self.amount_input = QDoubleSpinBox()
+        self.amount_input.setDecimals(2)
+        self.amount_input.setRange(-1000, 1000)
+        self.amount_input.setValue(3)
+        form.addRow("Component:", self.component_combo)
+        form.addRow("Operation:", self.operation_combo)
+        form.addRow("Amount:", self.amount_input)
+        layout.addLayout(form)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.preview = QTableWidget(0, 4)
+        self.preview.setHorizontalHeaderLabels(["Grade", "Before", "After", "Change"])
+        self.preview.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.preview.verticalHeader().setVisible(False)
+        self.preview.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.preview)
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Apply | QDialogButtonBox.StandardButton.Cancel
+        )
+        self.buttons.button(QDialogButtonBox.StandardButton.Apply).clicked.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+        self.setLayout(layout)
+
+        self.component_combo.currentIndexChanged.connect(self.update_preview)
+        self.operation_combo.currentIndexChanged.connect(self.update_preview)
+        self.amount_input.valueChanged.connect(self.update_preview)
+        self.update_preview()
+
+    def update_preview(self):
+        self.plan = ModerationPlan(
+            self.cohort, self.rows, self.component_combo.currentData(),
+            self.operation_combo.currentData(), self.amount_input.value(),
+        )
+        self.summary_label.setText(
+            f"{len(self.plan)} scores would change; {self.plan.regraded} students would change grade."
+        )
+        distribution = self.plan.distribution(self.cohort.scale.letters)
+        self.preview.setRowCount(len(distribution))
+        for row, (letter, before, after) in enumerate(distribution):
+            change = after - before
+            for column, value in enumerate([letter, before, after, f"{change:+d}" if change else ""]):
+                item = QTableWidgetItem(str(value))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.preview.setItem(row, column, item)
+        self.buttons.button(QDialogButtonBox.StandardButton.Apply).setEnabled(len(self.plan) > 0)
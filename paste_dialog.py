@@ -0,0 +1,81 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QDialogButtonBox,
+    QAbstractItemView, QPlainTextEdit
+)
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt
+
+
+class PasteDialog(QDialog):
+    # Shows what a pasted block would change before anything is applied:
+    # one line per student added or updated (old -> new for each changed
+    # score) and the rows left out with the reason.
+    PREVIEW_LIMIT = 2000
+
+    def __init__(self, result, cohort, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Paste Scores")
+        self.setMinimumSize(640, 480)
+        schema = result.schema
+        updates = len(result.update_rows)
+        inserts = len(result.new_ids)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(
+            f"{result.rows_read} rows pasted: {inserts} students to add, {updates} to update, "
+            f"{result.unchanged} unchanged, {len(result.errors)} with errors."
+        ))
+
+        shown = min(updates + inserts, self.PREVIEW_LIMIT)
+        self.preview = QTableWidget(shown, 3 + len(schema))
+        self.preview.setHorizontalHeaderLabels(["", "ID Number", "Name"] + schema.labels)
+        self.preview.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.preview.horizontalHeader().setStretchLastSection(True)
+        self.preview.verticalHeader().setVisible(False)
+        self.preview.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.preview.setUpdatesEnabled(False)
+        row = 0
+        for name, id_number, scores in zip(result.new_names, result.new_ids, result.new_scores.tolist()):
+            if row == shown:
+                break
+            self.set_row(row, ["Add", id_number, name] + [str(score) for score in scores], QColor("#e8f5e9"))
+            row += 1
+        for source_row, old, new in zip(result.update_rows.tolist(), result.old_scores.tolist(),
+                                        result.update_scores.tolist()):
+            if row == shown:
+                break
+            cells = ["Update", cohort.ids[source_row], cohort.names[source_row]] + [
+                f"{a} → {b}" if a != b else str(a) for a, b in zip(old, new)
+            ]
+            self.set_row(row, cells, QColor("#fff8e1"))
+            row += 1
+        self.preview.setUpdatesEnabled(True)
+        layout.addWidget(self.preview)
+        if updates + inserts > shown:
+            layout.addWidget(QLabel(f"... and {updates + inserts - shown} more."))
+
+        if result.errors:
+            layout.addWidget(QLabel("Rows left out:"))
+            errors = QPlainTextEdit()
+            errors.setReadOnly(True)
+            errors.setMaximumHeight(120)
+            errors.setPlainText("\n".join(f"Line {line}: {message}" for line, message in result.errors))
+            layout.addWidget(errors)
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Apply | QDialogButtonBox.StandardButton.Cancel
+        )
+        apply_button = self.buttons.button(QDialogButtonBox.StandardButton.Apply)
+        apply_button.clicked.connect(self.accept)
+        apply_button.setEnabled(updates + inserts > 0)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+        self.setLayout(layout)
+
+    def set_row(self, row, cells, color):
+        for column, text in enumerate(cells):
+            item = QTableWidgetItem(text)
+            item.setBackground(color)
+            if column != 2:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.preview.setItem(row, column, item)
@@ -0,0 +1,161 @@
+import re
+import numpy as np
+
+from csv_import import MISSING, normalize_header
+
+
+# Department / entry year and programme / serial, e.g. CSC/22U/0042.
+ID_PATTERN = re.compile(r"[A-Z]{2,4}/\d{2}[A-Z]/\d{4,}\Z")
+
+
+def split_block(text, schema):
+    # Tab-separated clipboard text (as copied from a spreadsheet) -> (fields,
+    # line numbers, cells) with cells a stripped (rows, fields) string
+    # array. A first row naming an ID column is taken as the header;
+    # otherwise the columns are in table order: name, ID, then components.
+    rows = [(number, line.split("\t")) for number, line in enumerate(text.splitlines(), 1)]
+    rows = [(number, cells) for number, cells in rows if any(cell.strip() for cell in cells)]
+    fields = ["name", "id_number"] + schema.keys
+    if rows:
+        header = [normalize_header(cell, schema) for cell in rows[0][1]]
+        if "id_number" in header:
+            fields = header
+            rows = rows[1:]
+    width = len(fields)
+    cells = np.array([(cells + [""] * width)[:width] for _, cells in rows], dtype=str)
+    cells = np.char.strip(cells.reshape(len(rows), width))
+    return fields, np.array([number for number, _ in rows], dtype=np.int64), cells
+
+
+# Numbers are clipped to this before the integer cast: past it a score is
+# out of range anyway, and casting a huge float (say 1e30) is undefined.
+CLIP = 2 ** 31
+
+
+def parse_numbers(column):
+    # A column of cells -> (values, invalid, fractional): blank cells are
+    # MISSING, anything but a number is invalid and numbers with a
+    # fractional part are flagged (and MISSING too). One float conversion
+    # for the whole column unless some cell is not a number at all.
+    blank = column == ""
+    filled = np.where(blank, "0", column)
+    try:
+        numbers = filled.astype(np.float64)
+    except ValueError:
+        numbers = np.array([to_float(value) for value in filled.tolist()], dtype=np.float64)
+    invalid = ~np.isfinite(numbers)
+    fractional = np.zeros_like(invalid)
+    fractional[~invalid] = numbers[~invalid] != np.floor(numbers[~invalid])
+    skip = blank | invalid | fractional
+    values = np.where(skip, MISSING, np.clip(np.where(skip, 0, numbers), -CLIP, CLIP)).astype(np.int64)
+    return values, invalid & ~blank, fractional & ~blank
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+class PasteResult:
+    # A pasted block checked against the roster without touching it: the
+    # existing students whose scores change (with old and new score rows),
+    # the new students to add, and (line, message) errors for rows left
+    # out. Blank score cells keep an existing student's score and are 0 for
+    # a new one.
+    def __init__(self, schema):
+        self.schema = schema
+        self.rows_read = 0
+        self.errors = []
+        self.unchanged = 0
+        self.update_rows = np.empty(0, dtype=np.int64)
+        self.old_scores = np.empty((0, len(schema)), dtype=np.int16)
+        self.update_scores = self.old_scores
+        self.new_names = []
+        self.new_ids = []
+        self.new_scores = np.empty((0, len(schema)), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.update_rows) + len(self.new_ids)
+
+
+def parse_paste(text, repository):
+    # Validates the whole block in one pass per check: ID format (for new
+    # students), IDs repeated within the block, score parsing and ranges,
+    # then splits the good rows into updates and inserts through the
+    # roster's ID index.
+    # Must run on the GUI thread, against the live roster.
+    cohort = repository.cohort
+    schema = cohort.schema
+    result = PasteResult(schema)
+    fields, lines, cells = split_block(text, schema)
+    count = len(lines)
+    result.rows_read = count
+    if not count:
+        return result
+
+    column = {}
+    for index, field in enumerate(fields):
+        if field:
+            column.setdefault(field, index)
+    ids = np.char.upper(cells[:, column["id_number"]])
+    names = cells[:, column["name"]] if "name" in column else np.full(count, "")
+
+    values = np.full((count, len(schema)), MISSING, dtype=np.int64)
+    invalid = np.zeros((count, len(schema)), dtype=bool)
+    fractional = np.zeros((count, len(schema)), dtype=bool)
+    for index, key in enumerate(schema.keys):
+        if key in column:
+            values[:, index], invalid[:, index], fractional[:, index] = parse_numbers(cells[:, column[key]])
+    out_of_range = (values != MISSING) & ((values < 0) | (values > schema.maxima))
+
+    id_list = ids.tolist()
+    missing_id = ids == ""
+    _, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+    repeated = ~missing_id & (counts[inverse.reshape(-1)] > 1)
+    rows = np.fromiter((repository.row_of(i) for i in id_list), np.int64, count)
+    existing = rows != -1
+    # Only new students must follow the ID format; students already on
+    # the roster may have come in with any ID through the other routes.
+    bad_format = ~missing_id & ~existing
+    bad_format[bad_format] = ~np.fromiter(
+        (ID_PATTERN.match(id_list[i]) is not None for i in np.flatnonzero(bad_format).tolist()), bool
+    )
+    nameless = ~existing & (names == "")
+
+    wrong = invalid | fractional | out_of_range
+    bad = missing_id | bad_format | repeated | wrong.any(axis=1) | nameless
+    for i in np.flatnonzero(bad).tolist():
+        if missing_id[i]:
+            message = "Missing ID number."
+        elif bad_format[i]:
+            message = f"{id_list[i]} is not a valid ID (e.g. CSC/22U/0042)."
+        elif repeated[i]:
+            message = f"{id_list[i]} appears more than once."
+        elif wrong[i].any():
+            message = ", ".join(
+                f"{label} must be a whole number" if whole else f"{label} must be 0-{maximum}"
+                for label, maximum, whole, flagged in zip(
+                    schema.labels, schema.maxima.tolist(), fractional[i].tolist(), wrong[i].tolist()
+                )
+                if flagged
+            ) + "."
+        else:
+            message = f"{id_list[i]} is not on the roster and has no name."
+        result.errors.append((int(lines[i]), message))
+
+    update = ~bad & existing
+    current = cohort.scores[rows[update]]
+    new = np.where(values[update] == MISSING, current, values[update]).astype(np.int16)
+    changed = (new != current).any(axis=1)
+    result.unchanged = int((~changed).sum())
+    result.update_rows = rows[update][changed]
+    result.old_scores = current[changed]
+    result.update_scores = new[changed]
+
+    insert = ~bad & ~existing
+    result.new_names = names[insert].tolist()
+    result.new_ids = ids[insert].tolist()
+    result.new_scores = np.where(values[insert] == MISSING, 0, values[insert])
+    return result
@@ -0,0 +1,137 @@
+from PyQt6.QtCore import Qt, QMarginsF, QRectF
+from PyQt6.QtGui import QColor, QFont, QFontMetricsF, QPageLayout, QPageSize, QPainter, QPdfWriter, QPen
+
+import assets
+
+
+# Shared pieces of the QPainter PDF backend. Everything is drawn directly
+# onto a QPdfWriter in device pixels, with the sizes from the HTML
+# stylesheets (8px padding, 1px #444 borders, #f0f0f0 header cells, 80px
+# logo). A CSS pixel is taken as one point, which is how QTextDocument sizes
+# them on a PDF device, so both backends produce the same proportions.
+RESOLUTION = 300
+FONT_FAMILY = "Segoe UI"
+TITLE_COLOR = "#2f80ed"
+BORDER_COLOR = "#444444"
+HEADER_FILL = "#f0f0f0"
+
+LEFT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+CENTER = Qt.AlignmentFlag.AlignCenter
+
+
+def make_font(point_size, bold=False):
+    font = QFont(FONT_FAMILY)
+    font.setPointSizeF(point_size)
+    font.setBold(bold)
+    return font
+
+
+class PdfPage:
+    # Wraps a QPdfWriter and its painter. Call close() (or use it as a
+    # context manager) to finish the file.
+    def __init__(self, file_path):
+        self.writer = QPdfWriter(str(file_path))
+        self.writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+        self.writer.setPageMargins(QMarginsF(1, 0, 5, 1), QPageLayout.Unit.Millimeter)
+        self.writer.setResolution(RESOLUTION)
+        self.px = RESOLUTION / 72
+        rect = self.writer.pageLayout().paintRectPixels(RESOLUTION)
+        self.width = rect.width()
+        self.height = rect.height()
+        self.padding = 8 * self.px
+        self.border = QPen(QColor(BORDER_COLOR))
+        self.border.setWidthF(self.px)
+        self.wrap = Qt.TextFlag.TextWordWrap
+        self.painter = QPainter(self.writer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.painter.isActive():
+            self.painter.end()
+
+    def new_page(self):
+        self.writer.newPage()
+
+    def metrics(self, font):
+        return QFontMetricsF(font, self.writer)
+
+    def cell_height(self, font):
+        return self.metrics(font).height() + 2 * self.padding
+
+    def fit_widths(self, widths, minimums=None):
+        # Tables keep their natural width, as QTextDocument lays them out.
+        # One wider than the page shrinks each column in proportion to its
+        # room above its minimum (the widest word it holds), and cell text
+        # wraps; see row_height. If even the minimums do not fit, words
+        # are broken too.
+        overflow = sum(widths) - self.width
+        if overflow <= 0:
+            return widths
+        if minimums is None:
+            minimums = [2 * self.padding] * len(widths)
+        minimums = [min(m, w) for m, w in zip(minimums, widths)]
+        room = sum(widths) - sum(minimums)
+        if overflow <= room:
+            return [w - (w - m) * overflow / room for w, m in zip(widths, minimums)]
+        self.wrap = Qt.TextFlag.TextWrapAnywhere
+        return [m * self.width / sum(minimums) for m in minimums]
+
+    def min_width(self, metrics, values):
+        # Widest single word among values, plus padding.
+        words = {word for value in values for word in value.split()}
+        return max((metrics.horizontalAdvance(word) for word in words), default=0) + 2 * self.padding
+
+    def row_height(self, values, widths, metrics):
+        # Height of a row whose cells wrap to their column widths; metrics
+        # are per column. Only text too wide for its cell is measured.
+        height = 0
+        for value, width, metric in zip(values, widths, metrics):
+            inner = width - 2 * self.padding
+            if metric.horizontalAdvance(value) <= inner:
+                lines = metric.height()
+            else:
+                lines = metric.boundingRect(QRectF(0, 0, inner, 1e6), int(self.wrap.value), value).height()
+            height = max(height, lines)
+        return height + 2 * self.padding
+
+    def letterhead(self, titles, logo=assets.LOGO):
+        # Logo, then one centered bold line per (text, point size, color);
+        # returns the y where the table starts.
+        y = 0
+        logo = assets.image(logo)
+        if not logo.isNull():
+            height = 80 * self.px
+            width = logo.width() * height / logo.height()
+            self.painter.drawImage(QRectF((self.width - width) / 2, y, width, height), logo)
+            y += height + 10 * self.px
+        for text, size, color in titles:
+            font = make_font(size, bold=True)
+            height = self.metrics(font).height()
+            self.painter.setFont(font)
+            self.painter.setPen(QColor(color))
+            self.painter.drawText(QRectF(0, y, self.width, height), CENTER, text)
+            y += height
+        return y + 20 * self.px
+
+    def cells(self, y, values, widths, height, fonts, fills=None, aligns=None):
+        # Draws one table row of bordered cells starting at the left margin;
+        # fonts, fills and aligns are per column.
+        painter = self.painter
+        x = 0
+        for column, (value, width) in enumerate(zip(values, widths)):
+            cell = QRectF(x, y, width, height)
+            painter.setFont(fonts[column])
+            if fills is not None and fills[column] is not None:
+                painter.fillRect(cell, QColor(fills[column]))
+            painter.setPen(self.border)
+            painter.drawRect(cell)
+            painter.setPen(QColor("#000000"))
+            align = aligns[column] if aligns is not None else CENTER
+            painter.drawText(cell.adjusted(self.padding, 0, -self.padding, 0), align | self.wrap, value)
+            x += width
+        return y + height
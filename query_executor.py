@@ -0,0 +1,121 @@
+import numpy as np
+from PyQt6.QtCore import QObject, QThreadPool, pyqtSignal
+
+from background import BackgroundTask
+
+
+ALL_GRADES = "All Grades"
+
+
+def run_query(task, repository, grade, search_text, fuzzy=False, fuzzy_limit=50, sort_field=None,
+              descending=False):
+    # Worker-thread side: returns (version, rows) where rows are the source
+    # rows to show, in display order, as of repository.version: roster order
+    # (best match first when fuzzy) unless sort_field is given, with ties
+    # in roster order. Holds the
+    # repository lock for the duration; task.report() between stages lets a
+    # superseded query stop early.
+    with repository.lock:
+        version = repository.version
+        cohort = repository.cohort
+        size = len(cohort)
+        task.report(0, 4)
+
+        mask = None
+        if grade != ALL_GRADES:
+            if grade in cohort.scale.letters:
+                mask = cohort.grade_codes[:size] == cohort.scale.letters.index(grade)
+            else:
+                mask = np.zeros(size, dtype=bool)
+        task.report(1, 4)
+
+        if not search_text:
+            rows = cohort.roster_order(None if mask is None else np.flatnonzero(mask))
+        elif fuzzy:
+            # Rank order, best match first.
+            results = repository.search_index().fuzzy(search_text, fuzzy_limit)
+            rows = repository.rows_of(key for _, key in results)
+            if mask is not None:
+                rows = rows[mask[rows]]
+        else:
+            hits = np.zeros(size, dtype=bool)
+            hits[repository.rows_of(repository.search(search_text))] = True
+            task.report(2, 4)
+            if mask is not None:
+                hits &= mask
+            rows = cohort.roster_order(np.flatnonzero(hits))
+        task.report(3, 4)
+
+        if sort_field is not None:
+            rows = repository.sort_rows(rows, sort_field, descending)
+        task.report(4, 4)
+        return version, rows
+
+
+def place_row(repository, rows, row, grade, search_text, sort_field=None, descending=False):
+    # GUI-thread companion to run_query for one changed student: returns
+    # where row belongs in rows (a run_query result without it), or -1 when
+    # it no longer passes the filter. Not for fuzzy results, which are in
+    # rank order.
+    with repository.lock:
+        cohort = repository.cohort
+        if grade != ALL_GRADES and cohort.grade(row) != grade:
+            return -1
+        if search_text and not repository.matches(row, search_text):
+            return -1
+        return repository.insert_position(rows, row, sort_field, descending)
+
+
+class QueryExecutor(QObject):
+    # Runs one query at a time on its own thread. Submitting a new query
+    # cancels the one in flight, and only the result (or error message) of
+    # the latest query is ever delivered, through ready (or failed).
+    ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.task = None
+        # Every task stays referenced until its last signal is delivered;
+        # a superseded one would otherwise be collected while that signal
+        # is still queued for the GUI thread.
+        self.pending = set()
+
+    def submit(self, fn, *args):
+        self._task(fn, *args).start(self.pool)
+
+    def run_now(self, fn, *args):
+        # Runs a query on the calling thread instead, superseding the one in
+        # flight; ready (or failed) has been emitted by the time this
+        # returns. Returns whether the query succeeded.
+        task = self._task(fn, *args)
+        errors = []
+        task.signals.failed.connect(errors.append)
+        task.run()
+        return not errors
+
+    def _task(self, fn, *args):
+        if self.task is not None:
+            self.task.cancel()
+        task = BackgroundTask(fn, *args)
+        task.setAutoDelete(False)
+        task.signals.finished.connect(lambda result: self._finished(task, result))
+        task.signals.cancelled.connect(lambda: self.pending.discard(task))
+        task.signals.failed.connect(lambda message: self._failed(task, message))
+        self.pending.add(task)
+        self.task = task
+        return task
+
+    def _finished(self, task, result):
+        self.pending.discard(task)
+        if task is self.task:
+            self.task = None
+            self.ready.emit(result)
+
+    def _failed(self, task, message):
+        self.pending.discard(task)
+        if task is self.task:
+            self.task = None
+            self.failed.emit(message)
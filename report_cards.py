@@ -0,0 +1,358 @@
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PyQt6.QtCore import QMarginsF
+from PyQt6.QtGui import QTextDocument
+from PyQt6.QtPrintSupport import QPrinter
+
+import assets
+from assessment_schema import DEFAULT_SCHEMA
+from pdf_painter import CENTER, HEADER_FILL, LEFT, TITLE_COLOR, PdfPage, make_font
+
+
+CARD_TEMPLATE = """
+        <html>
+            <head>
+                <style>
+                    body {{ font-family: 'Segoe UI'; font-size: 12pt; }}
+                    h1,h2 {{ text-align: center; color: #2f80ed; margin:0px; line-height:0px; }}
+                    h3 {{ text-align: center; margin:0px; line-height:0px; }}
+                    table {{
+                        width: 100%;
+                        border-collapse: collapse;
+                        margin-top: 20px;
+                    }}
+                    th, td {{
+                        border: 1px solid #444;
+                        padding: 8px;
+                        text-align: center;
+                    }}
+                    th {{
+                        background-color: #f0f0f0;
+                    }}
+                    .s_name {{
+                        text-align:left !important;
+                        white-space: nowrap;
+                        font-size: 11pt;
+                    }}
+                </style>
+            </head>
+            <body>
+                <div style="text-align: center; margin-bottom: 10px;">
+                    {img_tag}
+                </div>
+                <h1>MODIBBO ADAMA UNIVERSITY YOLA</h1>
+                <h2>DEPARTMENT OF COMPUTER SCIENCE</h2>
+                <h3>CSC201: INTRODUCTION TO PROGRAMMING USING PYTHON</h3>
+                <table>
+                    <tr><th>Student Name</th><td class="s_name">{name}</td></tr>
+                    <tr><th>ID Number</th><td>{id_number}</td></tr>
+{component_rows}
+                    <tr><th>Total</th><td>{total}</td></tr>
+                    <tr><th>Grade</th><td>{grade}</td></tr>
+                </table>
+            </body>
+        </html>
+        """
+
+# Bump when the card layout changes in a way CARD_TEMPLATE does not show
+# (margins, logo, the painter layout), so every cached card is re-rendered.
+TEMPLATE_VERSION = 1
+TEMPLATE_DIGEST = hashlib.sha256(CARD_TEMPLATE.encode("utf-8")).hexdigest()
+
+def logo_img_tag():
+    return assets.img_tag(assets.LOGO)
+
+
+COMPONENT_ROW = "                    <tr><th>{label}</th><td>{value}</td></tr>"
+
+
+def card_html(record, img_tag, schema=DEFAULT_SCHEMA):
+    # One table row per assessment component, between the ID and the total.
+    fields = {key: html.escape(str(value)) for key, value in record.items()}
+    component_rows = "\n".join(
+        COMPONENT_ROW.format(label=html.escape(label), value=fields[key])
+        for key, label in zip(schema.keys, schema.labels)
+    )
+    return CARD_TEMPLATE.format(img_tag=img_tag, component_rows=component_rows, **fields)
+
+
+def card_path(output_dir, id_number):
+    safe_id = "".join(c for c in id_number if c.isalnum() or c in ('-', '_'))
+    return pathlib.Path(output_dir) / f"{safe_id}.pdf"
+
+
+def render_card(record, file_path, img_tag, schema=DEFAULT_SCHEMA):
+    document = QTextDocument()
+    document.setHtml(card_html(record, img_tag, schema))
+    printer = QPrinter()
+    printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
+    printer.setOutputFileName(str(file_path))
+    printer.setPageMargins(QMarginsF(1, 0, 5, 1))
+    document.print(printer)
+
+
+# QPainter version of CARD_TEMPLATE, selected with the "pdf_renderer"
+# setting.
+CARD_TITLES = [
+    ("MODIBBO ADAMA UNIVERSITY YOLA", 18, TITLE_COLOR),
+    ("DEPARTMENT OF COMPUTER SCIENCE", 14, TITLE_COLOR),
+    ("CSC201: INTRODUCTION TO PROGRAMMING USING PYTHON", 10, "#000000"),
+]
+
+
+def card_rows(schema):
+    # (label, field) pairs, top to bottom.
+    return (
+        [("Student Name", "name"), ("ID Number", "id_number")]
+        + list(zip(schema.labels, schema.keys))
+        + [("Total", "total"), ("Grade", "grade")]
+    )
+
+
+def paint_card(record, file_path, schema=DEFAULT_SCHEMA):
+    label_font = make_font(12, bold=True)
+    value_font = make_font(12)
+    name_font = make_font(11)
+    rows = card_rows(schema)
+    with PdfPage(file_path) as page:
+        values = [str(record[field]) for _, field in rows]
+        labels = [label for label, _ in rows]
+        label_metrics = page.metrics(label_font)
+        value_metrics = page.metrics(value_font)
+        widths = page.fit_widths(
+            [
+                max(label_metrics.horizontalAdvance(label) for label in labels) + 2 * page.padding,
+                max(value_metrics.horizontalAdvance(value) for value in values) + 2 * page.padding,
+            ],
+            [page.min_width(label_metrics, labels), page.min_width(value_metrics, values)],
+        )
+        y = page.letterhead(CARD_TITLES)
+        for (label, field), value in zip(rows, values):
+            is_name = field == "name"
+            fonts = [label_font, name_font if is_name else value_font]
+            height = page.row_height([label, value], widths, [page.metrics(font) for font in fonts])
+            y = page.cells(
+                y, [label, value], widths, height, fonts,
+                [HEADER_FILL, None],
+                [CENTER, LEFT if is_name else CENTER],
+            )
+
+
+RENDERERS = ("html", "painter")
+
+
+def write_card(record, file_path, renderer="html", schema=DEFAULT_SCHEMA):
+    if renderer == "painter":
+        paint_card(record, file_path, schema)
+    else:
+        render_card(record, file_path, logo_img_tag(), schema)
+
+
+class CardCache:
+    # Manifest (manifest.json next to the PDFs) mapping each ID to a hash of
+    # the record, grading scale, assessment schema, template and renderer it
+    # came from, so only students whose card would change are rendered again.
+    def __init__(self, output_dir, scale=None, renderer="html", schema=DEFAULT_SCHEMA):
+        self.output_dir = pathlib.Path(output_dir)
+        self.renderer = renderer
+        self.schema = schema.to_dict()
+        self.manifest_path = self.output_dir / "manifest.json"
+        self.scale = scale.to_dict() if scale is not None else None
+        self.entries = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def key(self, record):
+        payload = json.dumps([TEMPLATE_VERSION, TEMPLATE_DIGEST, self.renderer, self.scale, self.schema, record], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_fresh(self, record):
+        id_number = record["id_number"]
+        return (
+            self.entries.get(id_number) == self.key(record)
+            and card_path(self.output_dir, id_number).exists()
+        )
+
+    def dirty(self, records):
+        return [record for record in records if not self.is_fresh(record)]
+
+    def mark(self, records):
+        for record in records:
+            self.entries[record["id_number"]] = self.key(record)
+
+    def save(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.manifest_path)
+
+
+# Worker-process side. Each process gets its own offscreen QGuiApplication
+# (and its own asset cache), then renders whole chunks of cards.
+_worker_app = None
+
+
+def init_worker():
+    global _worker_app
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt6.QtGui import QGuiApplication
+    _worker_app = QGuiApplication.instance() or QGuiApplication(["report_cards"])
+
+
+def render_chunk(records, output_dir, renderer="html", schema=DEFAULT_SCHEMA):
+    failures = []
+    for record in records:
+        try:
+            write_card(record, card_path(output_dir, record["id_number"]), renderer, schema)
+        except Exception as e:
+            failures.append((record["id_number"], str(e)))
+    return records, failures
+
+
+def select_records(repository, grades=None, ids=None):
+    # Returns (records, unknown_ids) for every student, the given grades,
+    # or the given ID list.
+    if ids:
+        records = []
+        unknown = []
+        for id_number in ids:
+            student = repository.get(id_number)
+            if student is None:
+                unknown.append(id_number)
+            else:
+                records.append(student.to_dict())
+        return records, unknown
+    cohort = repository.cohort
+    if grades:
+        codes = [cohort.scale.letters.index(g) for g in grades if g in cohort.scale.letters]
+        rows = np.flatnonzero(np.isin(cohort.grade_codes[:len(cohort)], codes))
+    else:
+        rows = np.arange(len(cohort))
+    return list(cohort.records_at(rows)), []
+
+
+def generate_cards(records, output_dir, workers=None, chunk_size=25, progress=None, scale=None, force=False,
+                   renderer="html", schema=DEFAULT_SCHEMA):
+    # Fans the cards that are not already up to date out over a process pool
+    # in chunks. progress(done, total) is called as chunks finish; an
+    # exception raised from it (for example TaskCancelled) cancels the
+    # remaining chunks. Returns (rendered, skipped, failures) where failures
+    # is a list of (id_number, error).
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cache = CardCache(output_dir, scale, renderer, schema)
+    todo = records if force else cache.dirty(records)
+    skipped = len(records) - len(todo)
+    if not todo:
+        if progress is not None:
+            progress(0, 0)
+        return 0, skipped, []
+
+    records = todo
+    total = len(records)
+    if workers is None:
+        chunks = -(-total // chunk_size)
+        workers = max(1, min((os.cpu_count() or 2) - 1, 8, chunks))
+    failures = []
+    done = 0
+    # Always spawn: forking a process that is running Qt is not safe.
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    )
+    try:
+        futures = [
+            executor.submit(render_chunk, records[i:i + chunk_size], str(output_dir), renderer, schema)
+            for i in range(0, total, chunk_size)
+        ]
+        for future in as_completed(futures):
+            chunk, chunk_failures = future.result()
+            done += len(chunk)
+            failures.extend(chunk_failures)
+            failed = {id_number for id_number, _ in chunk_failures}
+            cache.mark(record for record in chunk if record["id_number"] not in failed)
+            if progress is not None:
+                progress(done, total)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        cache.save()
+    return done - len(failures), skipped, failures
+
+
+def generate_cards_task(task, records, output_dir, scale=None, renderer="html", schema=DEFAULT_SCHEMA):
+    return generate_cards(records, output_dir, progress=task.report, scale=scale, renderer=renderer, schema=schema)
+
+
+def main(argv=None):
+    from settings import get_gradesys_path, load_settings
+    from storage import open_storage
+    from student_repository import StudentRepository
+    from grade_scale import GradeScale
+    from assessment_schema import AssessmentSchema
+
+    parser = argparse.ArgumentParser(description="Generate individual report cards.")
+    parser.add_argument("--grade", action="append", help="only students with this grade (repeatable)")
+    parser.add_argument("--ids", help="comma-separated ID numbers, or @file with one ID per line")
+    parser.add_argument("--output", help="output directory (default: GradeSys/individual_cards)")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--force", action="store_true", help="re-render cards that are already up to date")
+    parser.add_argument("--renderer", choices=RENDERERS, help="PDF backend (default: the pdf_renderer setting)")
+    args = parser.parse_args(argv)
+
+    settings = load_settings()
+    repository = StudentRepository()
+    if settings["grade_scale"]:
+        try:
+            repository.set_scale(GradeScale.from_dict(settings["grade_scale"]))
+        except (ValueError, AttributeError, TypeError) as e:
+            parser.error(f"invalid grade_scale setting: {e}")
+    if settings["assessment_schema"]:
+        repository.set_schema(AssessmentSchema.from_dict(settings["assessment_schema"]))
+    storage = open_storage(get_gradesys_path(), settings["storage"], repository.cohort.schema)
+    repository.load(storage.load())
+    storage.close()
+
+    ids = None
+    if args.ids:
+        if args.ids.startswith("@"):
+            with open(args.ids[1:], "r") as f:
+                ids = [line.strip() for line in f if line.strip()]
+        else:
+            ids = [i.strip() for i in args.ids.split(",") if i.strip()]
+    records, unknown = select_records(repository, args.grade, ids)
+    for id_number in unknown:
+        print(f"Unknown ID: {id_number}", file=sys.stderr)
+
+    output_dir = args.output or get_gradesys_path() / "individual_cards"
+
+    def progress(done, total):
+        print(f"\r{done}/{total} cards", end="", flush=True)
+
+    rendered, skipped, failures = generate_cards(
+        records, output_dir, args.workers, progress=progress, scale=repository.cohort.scale, force=args.force,
+        renderer=args.renderer or settings["pdf_renderer"], schema=repository.cohort.schema,
+    )
+    print()
+    for id_number, message in failures:
+        print(f"Failed {id_number}: {message}", file=sys.stderr)
+    print(f"{rendered} report cards written, {skipped} already up to date, in {output_dir}")
+    return 1 if failures or unknown else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from PyQt6.QtWidgets import QAbstractItemDelegate, QSpinBox, QStyledItemDelegate
+from PyQt6.QtCore import QEvent, Qt, pyqtSignal
+
+
+class ScoreDelegate(QStyledItemDelegate):
+    # Editors for the roster table: score cells get a spin box bounded by
+    # their component's maximum, the name cell the default line edit. Enter
+    # commits and emits advance, so the view can move straight down to the
+    # next student's cell, spreadsheet style.
+    advance = pyqtSignal()
+
+    def source_model(self, index):
+        model = index.model()
+        return model.sourceModel() if hasattr(model, "sourceModel") else model
+
+    def createEditor(self, parent, option, index):
+        source = self.source_model(index)
+        component = source.component_of(index.column())
+        if component < 0:
+            return super().createEditor(parent, option, index)
+        editor = QSpinBox(parent)
+        editor.setFrame(False)
+        editor.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        editor.setRange(0, int(source.repository.cohort.schema.maxima[component]))
+        return editor
+
+    def setEditorData(self, editor, index):
+        if isinstance(editor, QSpinBox):
+            editor.setValue(int(index.data(Qt.ItemDataRole.EditRole)))
+            editor.selectAll()
+        else:
+            super().setEditorData(editor, index)
+
+    def eventFilter(self, editor, event):
+        if event.type() == QEvent.Type.KeyPress and event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.commitData.emit(editor)
+            self.closeEditor.emit(editor, QAbstractItemDelegate.EndEditHint.NoHint)
+            self.advance.emit()
+            return True
+        return super().eventFilter(editor, event)
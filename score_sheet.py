@@ -0,0 +1,347 @@
+import html
+import os
+
+import numpy as np
+from PyQt6.QtCore import QMarginsF, QRectF, QSizeF
+from PyQt6.QtGui import QPageLayout, QPageSize, QPainter, QPdfWriter, QTextDocument, QTextTable
+
+from assessment_schema import DEFAULT_SCHEMA
+from pdf_painter import CENTER, HEADER_FILL, LEFT, TITLE_COLOR, PdfPage, make_font
+
+
+# Share of the table width for the name and ID columns; the other columns
+# split the rest evenly. Fixed widths make every page's table lay out like
+# the one measured for pagination.
+NAME_WIDTH = 40
+ID_WIDTH = 17
+
+SHEET_HEAD = """
+        <html>
+            <head>
+                <style>
+                    body {{ font-family: 'Segoe UI'; font-size: 12pt; }}
+                    h1,h2 {{ text-align: center; color: #2f80ed; margin:0px; line-height:0px; }}
+                    h3 {{ text-align: center; margin:0px; line-height:0px; }}
+                    table {{
+                        width: 100%;
+                        border-collapse: collapse;
+                        margin-top: 20px;
+                    }}
+                    th, td {{
+                        border: 1px solid #444;
+                        padding: 8px;
+                        text-align: center;
+                    }}
+                    th {{
+                        background-color: #f0f0f0;
+                        white-space: nowrap;
+                        padding: 8px 4px;
+                        font-size: 11pt;
+                    }}
+                    .id-column {{
+                        width: 180px;
+                        white-space: nowrap;
+                        font-size: 11pt;
+                    }}
+                    .s_name {{
+                        text-align:left !important;
+                        font-size: 11pt;
+                        min-width: 20%;
+                    }}
+                </style>
+            </head>
+            <body>
+                <div style="text-align: center; margin-bottom: 10px;">
+                    {img_tag}
+                </div>
+                <h1>MODIBBO ADAMA UNIVERSITY YOLA</h1>
+                <h2>DEPARTMENT OF COMPUTER SCIENCE</h2>
+                <h3>CSC201: INTRODUCTION TO PROGRAMING USING PYTHON SCORES SHEET</h3>
+"""
+
+CELL_INDENT = "\n                        "
+
+
+def column_widths(schema):
+    rest = (100 - NAME_WIDTH - ID_WIDTH) / (len(schema) + 3)
+    return [NAME_WIDTH, ID_WIDTH] + [rest] * (len(schema) + 3)
+
+
+def table_head(schema):
+    # Header row of every page's table; {page_break} is filled in per page.
+    # Rows in <thead> are repeated by QTextDocument should a table still
+    # run over a page.
+    labels = [html.escape(label).replace("{", "{{").replace("}", "}}") for label in schema.labels]
+    cells = ["Student Name", "ID Number"] + labels + ["Total", "Grade", "Position"]
+    classes = ["", ' class="id-column"'] + [""] * (len(cells) - 2)
+    cells = [
+        f'<th{css} width="{width:g}%">{cell}</th>'
+        for cell, css, width in zip(cells, classes, column_widths(schema))
+    ]
+    return (
+        "\n                <table{page_break}>\n                    <thead><tr>"
+        + "".join(CELL_INDENT + cell for cell in cells)
+        + "\n                    </tr></thead>\n"
+    )
+
+
+def row_template(schema):
+    cells = ['<td class="s_name">{name}</td>', '<td class="id-column">{id_number}</td>']
+    cells += [f"<td>{{{key}}}</td>" for key in schema.keys]
+    cells += ["<td>{total}</td>", "<td>{grade}</td>", "<td>{position}</td>"]
+    return (
+        "\n                    <tr>"
+        + "".join(CELL_INDENT + cell for cell in cells)
+        + "\n                    </tr>\n"
+    )
+
+
+# The templates for the default C.A / Practical / Exam schema.
+TABLE_HEAD = table_head(DEFAULT_SCHEMA)
+ROW = row_template(DEFAULT_SCHEMA)
+
+SHEET_TAIL = """
+            </body>
+        </html>
+"""
+
+
+def sheet_records(cohort, rows=None):
+    # Records with class position added, in the order of rows (default:
+    # roster order).
+    if rows is None:
+        rows = np.arange(len(cohort))
+    for record, position in zip(cohort.records_at(rows), cohort.positions(rows).tolist()):
+        record["position"] = position
+        yield record
+
+
+def sheet_rows(records, schema=DEFAULT_SCHEMA):
+    row = row_template(schema)
+    return [
+        row.format_map({
+            **record,
+            "name": html.escape(record["name"]),
+            "id_number": html.escape(record["id_number"]),
+        })
+        for record in records
+    ]
+
+
+def build_score_sheet_html(records, img_tag, pages=None, schema=DEFAULT_SCHEMA, rows=None):
+    # Collects the pieces in a list and joins once, so building is linear in
+    # the number of rows. pages is a list of (start, stop) row ranges, one
+    # table each with the header row; later pages start with a page break.
+    # Without it everything goes in one table (see paginate for real
+    # pages). rows are the already formatted sheet_rows, if at hand.
+    if rows is None:
+        rows = sheet_rows(records, schema)
+    if pages is None:
+        pages = [(0, len(rows))]
+    head = table_head(schema)
+    parts = [SHEET_HEAD.format(img_tag=img_tag)]
+    for page, (start, stop) in enumerate(pages):
+        page_break = ' style="page-break-before: always;"' if page else ""
+        parts.append(head.format(page_break=page_break))
+        parts.extend(rows[start:stop])
+        parts.append("</table>")
+    parts.append(SHEET_TAIL)
+    return "".join(parts)
+
+
+def pdf_writer(file_path):
+    writer = QPdfWriter(str(file_path))
+    writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+    writer.setPageMargins(QMarginsF(1, 0, 5, 1), QPageLayout.Unit.Millimeter)
+    return writer
+
+
+def page_rect(writer):
+    return writer.pageLayout().paintRectPixels(writer.resolution())
+
+
+def set_pdf_layout(document, writer):
+    document.documentLayout().setPaintDevice(writer)
+    rect = page_rect(writer)
+    document.setPageSize(QSizeF(rect.width(), rect.height()))
+
+
+def measure_rows(html_text, writer):
+    # Lays the sheet out as one unbroken table on the writer's metrics and
+    # returns (table top, header height, row heights), in device pixels.
+    document = QTextDocument()
+    document.documentLayout().setPaintDevice(writer)
+    document.setTextWidth(page_rect(writer).width())
+    document.setHtml(html_text)
+    layout = document.documentLayout()
+    # The letterhead (logo included) may lay out in frames of its own.
+    table = next(frame for frame in document.rootFrame().childFrames() if isinstance(frame, QTextTable))
+    bounds = layout.frameBoundingRect(table)
+    tops = [
+        layout.blockBoundingRect(table.cellAt(row, 0).firstCursorPosition().block()).top()
+        for row in range(table.rows())
+    ]
+    tops.append(bounds.bottom())
+    heights = np.diff(np.array(tops))
+    return bounds.top(), heights[0], heights[1:]
+
+
+def paginate(heights, header, first_top, page_height, slack):
+    # Greedy (start, stop) row ranges whose measured heights fit a page
+    # under the header; the first page starts below the letterhead. A row
+    # taller than a page gets a page to itself.
+    pages = []
+    start = 0
+    used = first_top + header
+    for row, height in enumerate(heights.tolist()):
+        if used + height > page_height - slack and row > start:
+            pages.append((start, row))
+            start = row
+            used = header
+        used += height
+    pages.append((start, len(heights)))
+    return pages
+
+
+def layout_score_sheet(records, img_tag, file_path, schema=DEFAULT_SCHEMA, progress=None):
+    # Builds the paginated sheet for render_pdf. Row heights come from
+    # laying every row out once, so wrapped names never push a page's
+    # table onto an extra page. The page count is checked against the
+    # plan, leaving more room at the foot of each page if it is off.
+    rows = sheet_rows(records, schema)
+    writer = pdf_writer(file_path)
+    height = page_rect(writer).height()
+    top, header, heights = measure_rows(build_score_sheet_html(None, img_tag, schema=schema, rows=rows), writer)
+    if progress is not None:
+        progress(1, 2)
+    slack = 40 * writer.resolution() / 72
+    for _ in range(4):
+        pages = paginate(heights, header, top, height, slack)
+        document = QTextDocument()
+        document.setHtml(build_score_sheet_html(None, img_tag, pages, schema, rows))
+        set_pdf_layout(document, writer)
+        if document.pageCount() == len(pages):
+            break
+        slack += header
+    if progress is not None:
+        progress(2, 2)
+    return document
+
+
+def render_pdf(document, file_path, progress=None):
+    # Lays the document out for a QPdfWriter and paints it page by page, so
+    # the caller gets progress and can cancel between pages. QPdfWriter and
+    # QTextDocument are safe to use off the GUI thread.
+    writer = pdf_writer(file_path)
+    set_pdf_layout(document, writer)
+    page_count = document.pageCount()
+    rect = page_rect(writer)
+
+    painter = QPainter(writer)
+    try:
+        height = rect.height()
+        for page in range(page_count):
+            if page:
+                writer.newPage()
+            painter.save()
+            painter.translate(0, -page * height)
+            document.drawContents(painter, QRectF(0, page * height, rect.width(), height))
+            painter.restore()
+            if progress is not None:
+                progress(page + 1, page_count)
+    finally:
+        painter.end()
+    return page_count
+
+
+def render_score_sheet(task, cohort, file_path, img_tag, rows=None):
+    # Runs on a BackgroundTask over a Cohort snapshot: measures and
+    # paginates the sheet (first half of the progress range), then paints
+    # the pages (second half).
+    tmp_path = file_path + ".part"
+    try:
+        document = layout_score_sheet(
+            sheet_records(cohort, rows), img_tag, tmp_path, cohort.schema,
+            progress=lambda done, total: task.report(done, 2 * total),
+        )
+        render_pdf(document, tmp_path, progress=lambda done, total: task.report(total + done, 2 * total))
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return file_path
+
+
+# QPainter backend: draws the same sheet with precomputed column widths and
+# row heights instead of laying HTML out through QTextDocument.
+def sheet_columns(schema):
+    headers = ["Student Name", "ID Number", *schema.labels, "Total", "Grade", "Position"]
+    fields = ["name", "id_number", *schema.keys, "total", "grade", "position"]
+    return headers, fields
+
+TITLES = [
+    ("MODIBBO ADAMA UNIVERSITY YOLA", 18, TITLE_COLOR),
+    ("DEPARTMENT OF COMPUTER SCIENCE", 14, TITLE_COLOR),
+    ("CSC201: INTRODUCTION TO PROGRAMING USING PYTHON SCORES SHEET", 10, "#000000"),
+]
+
+
+def paint_pdf(records, file_path, progress=None, schema=DEFAULT_SCHEMA):
+    records = list(records)
+    headers, fields = sheet_columns(schema)
+    cell_font = make_font(11)
+    header_font = make_font(12, bold=True)
+    header_fonts = [header_font] * len(headers)
+    header_fills = [HEADER_FILL] * len(headers)
+    row_fonts = [cell_font] * len(headers)
+    row_aligns = [LEFT] + [CENTER] * (len(headers) - 1)
+    columns = [[str(record[field]) for record in records] for field in fields]
+    total = len(records)
+    pages = 0
+    with PdfPage(file_path) as page:
+        # Widths come from the widest distinct value in each column, so
+        # each string is measured once however many rows share it.
+        cell_metrics = page.metrics(cell_font)
+        header_metrics = page.metrics(header_font)
+        widths = []
+        minimums = []
+        for header, values in zip(headers, columns):
+            distinct = set(values)
+            widest = max((cell_metrics.horizontalAdvance(v) for v in distinct), default=0)
+            widths.append(max(widest, header_metrics.horizontalAdvance(header)) + 2 * page.padding)
+            minimums.append(max(page.min_width(cell_metrics, distinct), page.min_width(header_metrics, [header])))
+        widths = page.fit_widths(widths, minimums)
+        header_height = page.row_height(headers, widths, [header_metrics] * len(headers))
+        cell_metrics = [cell_metrics] * len(headers)
+
+        row = 0
+        while row < total or pages == 0:
+            if pages:
+                page.new_page()
+            y = page.letterhead(TITLES) if pages == 0 else 0
+            y = page.cells(y, headers, widths, header_height, header_fonts, header_fills)
+            first = row
+            while row < total:
+                values = [column[row] for column in columns]
+                height = page.row_height(values, widths, cell_metrics)
+                # A row taller than a whole page still gets a page to itself.
+                if y + height > page.height and row > first:
+                    break
+                y = page.cells(y, values, widths, height, row_fonts, aligns=row_aligns)
+                row += 1
+            pages += 1
+            if progress is not None:
+                progress(row, total)
+    return pages
+
+
+def paint_score_sheet(task, cohort, file_path, rows=None):
+    # BackgroundTask entry point for the QPainter backend.
+    tmp_path = file_path + ".part"
+    try:
+        paint_pdf(sheet_records(cohort, rows), tmp_path, progress=task.report, schema=cohort.schema)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return file_path
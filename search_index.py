@@ -0,0 +1,250 @@
+import heapq
+from collections import Counter
+
+import numpy as np
+
+
+def search_text(name, id_number):
+    # What a query is matched against: the normalized name and the ID,
+    # both lower-cased, on separate lines so no match spans the two.
+    return " ".join(name.lower().split()) + "\n" + id_number.lower()
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+# A trigram is packed into 39 bits, 13 per character. Characters beyond
+# U+1FFF share codes with others, which only adds candidates that the
+# final substring check throws out. The remaining 24 bits of an int64 hold
+# the document number, so the whole index sorts as one array of keys.
+CHAR_BITS = 13
+CHAR_MASK = (1 << CHAR_BITS) - 1
+DOC_BITS = 24
+DOC_MASK = (1 << DOC_BITS) - 1
+
+
+def gram_code(gram):
+    return (
+        (ord(gram[0]) & CHAR_MASK) << (2 * CHAR_BITS)
+        | (ord(gram[1]) & CHAR_MASK) << CHAR_BITS
+        | (ord(gram[2]) & CHAR_MASK)
+    )
+
+
+def gram_codes(text):
+    return {gram_code(text[i:i + 3]) for i in range(len(text) - 2)}
+
+
+def fold(text):
+    # Spelling-insensitive form for fuzzy matching: drops apostrophes and
+    # hyphens and collapses doubled letters, so Sa'adu/Saadu/Sadu and
+    # Abdullahi/Abdulahi compare equal before any edits are counted.
+    # Repeated digits are kept: 122 and 12 are different students.
+    text = text.replace("'", "").replace("`", "").replace("-", " ")
+    out = []
+    for char in text:
+        if not out or out[-1] != char or not char.isalpha():
+            out.append(char)
+    return "".join(out)
+
+
+def edit_distance(a, b, limit=None):
+    # Levenshtein distance; gives up and returns limit + 1 as soon as the
+    # distance is known to exceed limit.
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(query, text, min_score=0.0):
+    # 1.0 for a substring match, otherwise 1 - edit distance / length,
+    # taking the best of the ID and every run of as many name words as the
+    # query has (so "musa" can match the surname alone). Names are compared
+    # folded, IDs as typed. Targets that cannot reach min_score are cut
+    # short.
+    if query in text:
+        return 1.0
+    name, id_number = text.split("\n", 1)
+    folded = fold(query)
+    pairs = [(query, id_number)]
+    words = fold(name).split()
+    width = len(folded.split())
+    pairs.extend(
+        (folded, " ".join(words[i:i + width])) for i in range(max(1, len(words) - width + 1))
+    )
+    best = 0.0
+    for source, target in pairs:
+        longest = max(len(source), len(target))
+        if not longest:
+            continue
+        limit = int(longest * (1 - max(best, min_score)))
+        distance = edit_distance(source, target, limit)
+        if distance <= limit:
+            best = max(best, 1 - distance / longest)
+    return best
+
+
+class SearchIndex:
+    # Trigram index for substring search over names and IDs. The bulk of it
+    # is built in one vectorized pass: every distinct (trigram, doc) pair,
+    # sorted, so a trigram's postings are one searchsorted slice already in
+    # doc order. Students added or renamed since the build go into a small
+    # dict-of-sets delta instead; deleted students simply drop out of
+    # self.texts. Every candidate is checked against its current text, so
+    # stale postings never leak into results. The arrays are rebuilt once
+    # the delta outgrows REBUILD_FRACTION of them.
+    REBUILD_FRACTION = 0.1
+    MIN_REBUILD = 1000
+
+    def __init__(self, names=(), ids=()):
+        self.texts = {}
+        self.build(names, ids)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def build(self, names, ids):
+        self.texts = {key: search_text(name, key) for name, key in zip(names, ids)}
+        self._base_ids = list(self.texts)
+        self._delta = {}
+        self._delta_ids = set()
+        texts = [self.texts[key] for key in self._base_ids]
+        if not texts:
+            self._keys = np.zeros(0, dtype=np.int64)
+            return
+        # All texts joined with a separator that never appears in a
+        # trigram, decoded to code points in one go.
+        joined = "\x00".join(texts) + "\x00"
+        points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        docs = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        keep = (points[:-2] != 0) & (points[1:-1] != 0) & (points[2:] != 0)
+        chars = points & CHAR_MASK
+        grams = (chars[:-2] << (2 * CHAR_BITS)) | (chars[1:-1] << CHAR_BITS) | chars[2:]
+        keys = np.sort((grams[keep] << DOC_BITS) | docs[:-2][keep])
+        distinct = np.ones(len(keys), dtype=bool)
+        distinct[1:] = keys[1:] != keys[:-1]
+        self._keys = keys[distinct]
+
+    def add(self, key, name):
+        # Also used for renames: the new text replaces the old one, and the
+        # stale postings are filtered out when candidates are checked.
+        text = search_text(name, key)
+        self.texts[key] = text
+        self._delta_ids.add(key)
+        for code in gram_codes(text):
+            self._delta.setdefault(code, set()).add(key)
+        if len(self._delta_ids) > max(self.MIN_REBUILD, self.REBUILD_FRACTION * len(self._base_ids)):
+            self.build(*self._names_and_ids())
+
+    def add_many(self, names, ids):
+        if len(ids) <= max(self.MIN_REBUILD, self.REBUILD_FRACTION * len(self._base_ids)):
+            for name, key in zip(names, ids):
+                self.add(key, name)
+            return
+        for name, key in zip(names, ids):
+            self.texts[key] = search_text(name, key)
+        self.build(*self._names_and_ids())
+
+    def remove(self, key):
+        self.texts.pop(key, None)
+        self._delta_ids.discard(key)
+
+    def _names_and_ids(self):
+        ids = list(self.texts)
+        return [self.texts[key].split("\n", 1)[0] for key in ids], ids
+
+    def _postings(self, code):
+        start, stop = np.searchsorted(self._keys, [code << DOC_BITS, (code + 1) << DOC_BITS])
+        return self._keys[start:stop] & DOC_MASK
+
+    def candidates(self, query):
+        codes = sorted(gram_codes(query))
+        # Base arrays: intersect postings from the rarest trigram up. Stop
+        # once few candidates are left, or once the next list is so much
+        # longer that checking the candidates directly is cheaper.
+        postings = sorted((self._postings(code) for code in codes), key=len)
+        docs = postings[0]
+        for other in postings[1:]:
+            if len(docs) <= 64 or len(other) > 16 * len(docs):
+                break
+            docs = np.intersect1d(docs, other, assume_unique=True)
+        base_ids = self._base_ids
+        found = [base_ids[doc] for doc in docs.tolist()]
+        # Delta: plain set intersection.
+        if self._delta_ids:
+            sets = sorted((self._delta.get(code, ()) for code in codes), key=len)
+            found.extend(set(sets[0]).intersection(*sets[1:]))
+        return found
+
+    def fuzzy(self, query, limit=20, min_score=0.6, pool=100):
+        # Typo-tolerant lookup. Returns up to limit (score, id) pairs, best
+        # first. Candidates are pruned with the trigram postings: a string
+        # within k edits of the query still shares all but 3k of its
+        # trigrams, so only the pool students with the most shared trigrams
+        # (and at least that many) are scored with edit distance.
+        query = normalize_query(query)
+        if len(query) < 3:
+            return []
+        codes = gram_codes(fold(query)) | gram_codes(query)
+        max_edits = max(1, len(query) // 4)
+        need = max(1, len(gram_codes(query)) - 3 * max_edits)
+
+        hits = Counter()
+        postings = [self._postings(code) for code in codes]
+        if postings and self._base_ids:
+            counts = np.bincount(np.concatenate(postings), minlength=len(self._base_ids))
+            docs = np.flatnonzero(counts >= need)
+            counts = counts[docs]
+            keep = counts >= need
+            docs, counts = docs[keep], counts[keep]
+            if len(docs) > pool:
+                top = np.argpartition(counts, -pool)[-pool:]
+                docs, counts = docs[top], counts[top]
+            base_ids = self._base_ids
+            delta_ids = self._delta_ids
+            for doc, count in zip(docs.tolist(), counts.tolist()):
+                key = base_ids[doc]
+                if key not in delta_ids:
+                    hits[key] = count
+        if self._delta_ids:
+            delta = Counter()
+            for code in codes:
+                delta.update(self._delta.get(code, ()))
+            hits.update({key: count for key, count in delta.items() if count >= need})
+
+        texts = self.texts
+        scored = []
+        for key, _ in hits.most_common(pool):
+            text = texts.get(key)
+            if text is None:
+                continue
+            score = similarity(query, text, min_score)
+            if score >= min_score:
+                scored.append((score, key))
+        return heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+
+    def search(self, query):
+        # Returns the set of IDs whose name or ID contains query.
+        query = normalize_query(query)
+        if not query:
+            return set(self.texts)
+        texts = self.texts
+        if len(query) < 3:
+            return {key for key, text in texts.items() if query in text}
+        return {key for key in self.candidates(query) if query in texts.get(key, "")}
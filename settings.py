@@ -0,0 +1,35 @@
+import json
+import pathlib
+
+
+DEFAULT_SETTINGS = {
+    "storage": "sqlite",
+    "grade_scale": None,
+    # AssessmentSchema.to_dict(); None means C.A 30, Practical 20, Exam 50.
+    "assessment_schema": None,
+    # "html" lays PDFs out through QTextDocument, "painter" draws them
+    # directly with QPainter (faster on large score sheets).
+    "pdf_renderer": "html",
+}
+
+
+def get_gradesys_path():
+    documents_dir = pathlib.Path.home() / "Documents"
+    gradesys_dir = documents_dir / "GradeSys"
+    gradesys_dir.mkdir(parents=True, exist_ok=True)
+    return gradesys_dir
+
+
+def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
+    file_path = get_gradesys_path() / "settings.json"
+    if file_path.exists():
+        with open(file_path, "r") as f:
+            settings.update(json.load(f))
+    return settings
+
+
+def save_settings(settings):
+    file_path = get_gradesys_path() / "settings.json"
+    with open(file_path, "w") as f:
+        json.dump(settings, f, indent=4)
@@ -0,0 +1,41 @@
+import bisect
+
+import numpy as np
+
+
+class SortedKeys:
+    # (sort key, id) pairs kept in order with bisect, so adding, removing or
+    # renaming a student moves one entry (a list insert or delete) instead
+    # of re-sorting the roster. rank() turns the order into a row -> rank
+    # array that sorts any subset of rows with one integer argsort, for
+    # full queries; it is rebuilt on the first query after a change.
+    def __init__(self, pairs=()):
+        self.pairs = sorted(pairs)
+        self._rank = None
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def add(self, sort_key, id_number):
+        bisect.insort(self.pairs, (sort_key, id_number))
+        self._rank = None
+
+    def add_many(self, pairs):
+        # Timsort merges the already-sorted list with the new run.
+        self.pairs.extend(pairs)
+        self.pairs.sort()
+        self._rank = None
+
+    def remove(self, sort_key, id_number):
+        index = bisect.bisect_left(self.pairs, (sort_key, id_number))
+        if index < len(self.pairs) and self.pairs[index] == (sort_key, id_number):
+            del self.pairs[index]
+            self._rank = None
+
+    def rank(self, rows_by_id, size):
+        if self._rank is None or len(self._rank) != size:
+            rank = np.zeros(size, dtype=np.int32)
+            order = np.fromiter((rows_by_id[key] for _, key in self.pairs), dtype=np.int64, count=len(self.pairs))
+            rank[order] = np.arange(len(order), dtype=np.int32)
+            self._rank = rank
+        return self._rank
@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import threading
+from assessment_schema import DEFAULT_SCHEMA
+from student import Student
+
+
+class JsonStorage:
+    # The original students.json format, used as a snapshot plus an
+    # append-only journal (students.journal) of compact change records. Each
+    # edit appends one line; once the journal passes COMPACT_THRESHOLD
+    # entries it is rotated and folded into a fresh snapshot on a background
+    # thread. Snapshots are written through a temporary file and os.replace,
+    # so a crash never leaves students.json truncated.
+    COMPACT_THRESHOLD = 1000
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.journal_path = file_path.with_suffix(".journal")
+        self.compacting_path = file_path.with_suffix(".journal.compacting")
+        self.records = {}
+        self.journal = None
+        self.journal_entries = 0
+        self.lock = threading.Lock()
+        self.compactor = None
+
+    def load(self):
+        self.records = {}
+        if self.file_path.exists():
+            with open(self.file_path, "r") as f:
+                for item in json.load(f):
+                    self.records.setdefault(item.get("id_number", "").upper(), item)
+        interrupted = self.compacting_path.exists()
+        if interrupted:
+            self.replay(self.compacting_path)
+        self.journal_entries, torn = self.replay(self.journal_path)
+        if interrupted or torn:
+            self.save_all_records()
+        return list(self.records.values())
+
+    def replay(self, path):
+        entries = 0
+        torn = False
+        if not path.exists():
+            return entries, torn
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append.
+                    torn = True
+                    continue
+                if entry["op"] == "upsert":
+                    record = entry["student"]
+                    self.records[record["id_number"]] = record
+                elif entry["op"] == "upsert_many":
+                    for record in entry["students"]:
+                        self.records[record["id_number"]] = record
+                elif entry["op"] == "delete":
+                    self.records.pop(entry["id_number"], None)
+                entries += 1
+        return entries, torn
+
+    def save_all(self, records):
+        self.records = {record["id_number"]: record for record in records}
+        self.save_all_records()
+
+    def save_all_records(self):
+        self.wait_for_compaction()
+        with self.lock:
+            self.close_journal()
+            self.write_snapshot(self.records.values())
+            for path in (self.journal_path, self.compacting_path):
+                if path.exists():
+                    path.unlink()
+            self.journal_entries = 0
+
+    def set_schema(self, schema):
+        # Records are plain dicts, so any set of components fits.
+        pass
+
+    def upsert(self, student):
+        record = student.to_dict()
+        self.records[student.id_number] = record
+        self.append({"op": "upsert", "student": record})
+
+    def upsert_many(self, records):
+        # One journal line for the whole batch, so a crash mid-write loses
+        # the batch (a torn line) rather than applying part of it.
+        records = list(records)
+        if not records:
+            return
+        for record in records:
+            self.records[record["id_number"]] = record
+        self.append({"op": "upsert_many", "students": records})
+
+    def delete(self, id_number):
+        self.records.pop(id_number, None)
+        self.append({"op": "delete", "id_number": id_number})
+
+    def append(self, *entries):
+        if not entries:
+            return
+        with self.lock:
+            if self.journal is None:
+                self.journal = open(self.journal_path, "a")
+            self.journal.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries))
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.journal_entries += len(entries)
+            if self.journal_entries >= self.COMPACT_THRESHOLD and self.compactor is None:
+                self.start_compaction()
+
+    def start_compaction(self):
+        # Called with the lock held: rotate the journal so new edits go to a
+        # fresh file while the snapshot is written in the background.
+        self.close_journal()
+        os.replace(self.journal_path, self.compacting_path)
+        self.journal_entries = 0
+        snapshot = list(self.records.values())
+        self.compactor = threading.Thread(target=self.compact, args=(snapshot,), daemon=True)
+        self.compactor.start()
+
+    def compact(self, snapshot):
+        self.write_snapshot(snapshot)
+        with self.lock:
+            self.compacting_path.unlink()
+            self.compactor = None
+
+    def wait_for_compaction(self):
+        compactor = self.compactor
+        if compactor is not None:
+            compactor.join()
+
+    def write_snapshot(self, records):
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(list(records), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def close(self):
+        self.wait_for_compaction()
+        with self.lock:
+            self.close_journal()
+
+
+def quoted(columns):
+    return ", ".join(f'"{column}"' for column in columns)
+
+
+class SqliteStorage:
+    # One column per assessment component. Columns are added when a schema
+    # introduces a component; those of dropped components are left in place
+    # but no longer read or written. A schema change always ends in a
+    # save_all, which rewrites every row, so their old scores are lost and a
+    # component that comes back starts at 0.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS students (
+            id_number TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            grade TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_students_name ON students (name);
+        CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade);
+    """
+
+    def __init__(self, file_path, schema=DEFAULT_SCHEMA):
+        self.file_path = file_path
+        self.conn = sqlite3.connect(str(file_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.set_schema(schema)
+
+    def set_schema(self, schema):
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(students)")}
+        with self.conn:
+            for key in schema.keys:
+                if key not in existing:
+                    self.conn.execute(f'ALTER TABLE students ADD COLUMN "{key}" INTEGER NOT NULL DEFAULT 0')
+        self.fields = ["name", "id_number", *schema.keys]
+        columns = ["id_number", "name", *schema.keys, "total", "grade"]
+        self.select = f"SELECT {quoted(self.fields)} FROM students ORDER BY rowid"
+        self.upsert_sql = (
+            f"INSERT INTO students ({quoted(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+            "ON CONFLICT (id_number) DO UPDATE SET "
+            + ", ".join(f'"{c}" = excluded."{c}"' for c in columns[1:])
+        )
+
+    def load(self):
+        return [dict(zip(self.fields, row)) for row in self.conn.execute(self.select)]
+
+    def save_all(self, records):
+        with self.conn:
+            self.conn.execute("DELETE FROM students")
+            self.conn.executemany(self.upsert_sql, records)
+
+    def upsert(self, student):
+        with self.conn:
+            self.conn.execute(self.upsert_sql, student.to_dict())
+
+    def upsert_many(self, records):
+        with self.conn:
+            self.conn.executemany(self.upsert_sql, records)
+
+    def delete(self, id_number):
+        with self.conn:
+            self.conn.execute("DELETE FROM students WHERE id_number = ?", (id_number,))
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(json_path, db_path, schema=DEFAULT_SCHEMA):
+    # One-shot import of an existing students.json into a new database. The
+    # JSON file is left untouched as a backup.
+    if db_path.exists() or not json_path.exists():
+        return False
+    records = JsonStorage(json_path).load()
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    storage = SqliteStorage(tmp_path, schema)
+    rows = []
+    for item in records:
+        student = Student(
+            item.get("name") or "",
+            item.get("id_number", ""),
+            *[item.get(key, 0) for key in schema.keys],
+            schema=schema,
+        )
+        if student.id_number:
+            rows.append(student.to_dict())
+    storage.upsert_many(rows)
+    storage.close()
+    os.replace(tmp_path, db_path)
+    return True
+
+
+def open_storage(directory, backend="sqlite", schema=DEFAULT_SCHEMA):
+    json_path = directory / "students.json"
+    if backend == "json":
+        return JsonStorage(json_path)
+    if backend == "sqlite":
+        db_path = directory / "students.db"
+        migrate_json_to_sqlite(json_path, db_path, schema)
+        return SqliteStorage(db_path, schema)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -1,23 +1,88 @@
+from assessment_schema import DEFAULT_SCHEMA
+from cohort import Cohort
+
+
 class Student:
-    def __init__(self, name, id_number, ca, practical, exam):
-        self.name = name
-        self.id_number = id_number.upper()
-        self.ca = ca
-        self.practical = practical
-        self.exam = exam
-        self.total = ca + practical + exam
-        self.grade = self.calculate_grade()
+    # A row view over a Cohort. Constructing a Student directly gives it a
+    # private one-row cohort; StudentRepository.add re-points it at the
+    # shared roster cohort. __slots__ keeps each view to two references.
+    # Component scores follow the cohort's assessment schema: read them by
+    # key (student.ca or student.score("ca")). Views are read-only; every
+    # change goes through StudentRepository, which keeps its indexes, lock
+    # and version in step.
+    __slots__ = ("_cohort", "_row")
+
+    def __init__(self, name, id_number, *scores, schema=DEFAULT_SCHEMA):
+        if len(scores) != len(schema):
+            raise ValueError(f"Expected {len(schema)} scores ({', '.join(schema.labels)}), got {len(scores)}.")
+        cohort = Cohort(capacity=1, schema=schema)
+        self._cohort = cohort
+        self._row = cohort.append(name, id_number.upper(), scores)
+        cohort.views[self._row] = self
+
+    @classmethod
+    def view(cls, cohort, row):
+        student = cls.__new__(cls)
+        student._cohort = cohort
+        student._row = row
+        return student
+
+    def attach(self, cohort, row):
+        self._cohort = cohort
+        self._row = row
+
+    def detach(self):
+        cohort = Cohort(capacity=1, scale=self._cohort.scale, schema=self._cohort.schema)
+        cohort.append(self.name, self.id_number, self._cohort.scores[self._row])
+        cohort.views[0] = self
+        self.attach(cohort, 0)
+
+    @property
+    def name(self):
+        return self._cohort.names[self._row]
+
+    @property
+    def id_number(self):
+        return self._cohort.ids[self._row]
+
+    def __getattr__(self, key):
+        # Only reached for names that are not slots or properties.
+        if key.startswith("_"):
+            raise AttributeError(key)
+        try:
+            return self.score(key)
+        except ValueError:
+            raise AttributeError(key) from None
+
+    @property
+    def schema(self):
+        return self._cohort.schema
+
+    @property
+    def scores(self):
+        return tuple(self._cohort.scores[self._row].tolist())
+
+    def score(self, key):
+        return int(self._cohort.scores[self._row, self._cohort.schema.keys.index(key)])
+
+    @property
+    def total(self):
+        return int(self._cohort.totals[self._row])
+
+    @property
+    def grade(self):
+        return self._cohort.grade(self._row)
+
+    @property
+    def position(self):
+        return self._cohort.position(self._row)
 
     def calculate_grade(self):
-        if self.total >= 70:
-            return "A"
-        elif self.total >= 60:
-            return "B"
-        elif self.total >= 50:
-            return "C"
-        elif self.total >= 45:
-            return "D"
-        elif self.total >= 40:
-            return "E"
-        else:
-            return "F"
+        return self._cohort.scale.grade(self.total)
+
+    def to_dict(self):
+        record = {"name": self.name, "id_number": self.id_number}
+        record.update(zip(self._cohort.schema.keys, self.scores))
+        record["total"] = self.total
+        record["grade"] = self.grade
+        return record
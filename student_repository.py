@@ -0,0 +1,294 @@
+import threading
+
+import numpy as np
+from cohort import Cohort
+from search_index import SearchIndex, normalize_query, search_text
+from sort_index import SortedKeys
+
+
+def normalize_id(id_number):
+    return id_number.strip().upper()
+
+
+def normalize_name(name):
+    return " ".join(name.lower().split())
+
+
+class StudentRepository:
+    # Students live in a Cohort column store (the table model's rows) with a
+    # hash index from id_number to row. The trigram search index is built
+    # on first use and then kept up to date.
+    # Deleting swaps the last student into the freed row so every operation
+    # stays O(1); Cohort.roster_order still gives the students in the order
+    # they were added.
+    #
+    # Mutations and search-index access hold self.lock, so a query running
+    # on a worker thread (see query_executor) sees a consistent roster.
+    def __init__(self, students=()):
+        self.cohort = Cohort()
+        self._rows = {}
+        self._search = None
+        self._sorted = {}
+        # Bumped on every change, so callers can tell when cached query
+        # results are stale.
+        self.version = 0
+        self.lock = threading.RLock()
+        for student in students:
+            self.add(student)
+
+    def __len__(self):
+        return len(self.cohort)
+
+    def __iter__(self):
+        return (self.cohort.view(row) for row in range(len(self.cohort)))
+
+    def __contains__(self, id_number):
+        return normalize_id(id_number) in self._rows
+
+    def records(self, start=0, stop=None):
+        return self.cohort.records(start, stop)
+
+    def at(self, row):
+        return self.cohort.view(row)
+
+    def row_of(self, id_number):
+        return self._rows.get(normalize_id(id_number), -1)
+
+    def rows_of(self, keys):
+        # Rows of already-normalized IDs, as an int array.
+        rows = self._rows
+        return np.fromiter((rows[key] for key in keys if key in rows), dtype=np.int64)
+
+    def get(self, id_number):
+        row = self.row_of(id_number)
+        if row == -1:
+            return None
+        return self.cohort.view(row)
+
+    def search_index(self):
+        with self.lock:
+            if self._search is None:
+                size = len(self.cohort)
+                self._search = SearchIndex(self.cohort.names[:size], self.cohort.ids[:size])
+            return self._search
+
+    def search(self, text):
+        # IDs of the students whose name or ID contains text (see SearchIndex).
+        with self.lock:
+            return self.search_index().search(text)
+
+    def matches(self, row, text):
+        # Whether search(text) would return the student at row.
+        query = normalize_query(text)
+        return not query or query in search_text(self.cohort.names[row], self.cohort.ids[row])
+
+    def fuzzy_search(self, text, limit=20, min_score=0.6):
+        # Typo-tolerant lookup: [(student, score)], best match first.
+        with self.lock:
+            results = self.search_index().fuzzy(text, limit, min_score)
+            return [(self.cohort.view(self._rows[key]), score) for score, key in results]
+
+    def grades(self):
+        counts = self.cohort.grade_counts()
+        return sorted(self.cohort.scale.letters[code] for code in np.flatnonzero(counts))
+
+    def sort_rows(self, rows, field, descending=False):
+        # rows reordered by field, ties kept in their current order. Name and
+        # ID use SortedKeys indexes kept in step with every change; the
+        # score columns are small integers, sorted with a stable radix sort.
+        # Position and grade sort best first.
+        with self.lock:
+            cohort = self.cohort
+            rows = np.asarray(rows, dtype=np.int64)
+            if field in ("name", "id_number"):
+                keys = self._sorted_keys(field).rank(self._rows, len(cohort))[rows]
+            elif field in cohort.schema.keys:
+                keys = cohort.scores[rows, cohort.schema.keys.index(field)].astype(np.int16)
+            elif field == "total":
+                keys = cohort.totals[rows].astype(np.int16)
+            elif field == "position":
+                keys = -cohort.totals[rows].astype(np.int16)
+            elif field == "grade":
+                keys = -cohort.grade_codes[rows].astype(np.int16)
+            else:
+                raise ValueError(f"Cannot sort by {field}")
+            if descending:
+                keys = -keys
+            return rows[np.argsort(keys, kind="stable")]
+
+    def insert_position(self, rows, row, field, descending=False):
+        # Where row goes in rows, which are in sort_rows order for field (or
+        # roster order when field is None) with ties in roster order, found
+        # by bisection: one key lookup per step, so an edited student moves
+        # without sorting the rows again.
+        with self.lock:
+            key = self._row_key(field, descending)
+            # Names and IDs are unique keys, so descending is the exact
+            # reverse; numeric keys are negated instead.
+            reverse = descending and field in ("name", "id_number")
+            target = key(row)
+            low, high = 0, len(rows)
+            while low < high:
+                middle = (low + high) // 2
+                probe = key(int(rows[middle]))
+                if (probe > target) if reverse else (probe < target):
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+
+    def _row_key(self, field, descending):
+        # One row's sort key, ordered like sort_rows over roster-ordered rows.
+        cohort = self.cohort
+        sign = -1 if descending else 1
+        sequence = cohort.sequence
+        if field is None:
+            return lambda row: int(sequence[row])
+        if field == "name":
+            return lambda row: (normalize_name(cohort.names[row]), cohort.ids[row])
+        if field == "id_number":
+            return lambda row: cohort.ids[row]
+        if field in cohort.schema.keys:
+            column = cohort.schema.keys.index(field)
+            return lambda row: (sign * int(cohort.scores[row, column]), int(sequence[row]))
+        if field == "total":
+            return lambda row: (sign * int(cohort.totals[row]), int(sequence[row]))
+        if field == "position":
+            return lambda row: (-sign * int(cohort.totals[row]), int(sequence[row]))
+        if field == "grade":
+            return lambda row: (-sign * int(cohort.grade_codes[row]), int(sequence[row]))
+        raise ValueError(f"Cannot sort by {field}")
+
+    def _sorted_keys(self, field):
+        index = self._sorted.get(field)
+        if index is None:
+            size = len(self.cohort)
+            names = self.cohort.names[:size] if field == "name" else self.cohort.ids[:size]
+            index = SortedKeys(
+                (self._sort_key(field, name), key) for name, key in zip(names, self.cohort.ids[:size])
+            )
+            self._sorted[field] = index
+        return index
+
+    @staticmethod
+    def _sort_key(field, value):
+        return normalize_name(value) if field == "name" else value
+
+    def statistics(self):
+        # See Cohort.statistics; constant time, kept current by every change.
+        with self.lock:
+            return self.cohort.statistics()
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        with self.lock:
+            return self.cohort.quantiles(qs)
+
+    def set_scale(self, scale):
+        with self.lock:
+            self.cohort.set_scale(scale)
+            self.version += 1
+
+    def set_schema(self, schema):
+        # See Cohort.set_schema; returns how many scores were capped.
+        with self.lock:
+            capped = self.cohort.set_schema(schema)
+            self.version += 1
+            return capped
+
+    def ensure_unique(self, id_number):
+        if not normalize_id(id_number):
+            raise ValueError("ID Number is required.")
+        if id_number in self:
+            raise ValueError(f"A student with ID {normalize_id(id_number)} already exists.")
+
+    def add(self, student):
+        with self.lock:
+            self.ensure_unique(student.id_number)
+            key = normalize_id(student.id_number)
+            row = self.cohort.append(student.name, key, student.scores)
+            student.attach(self.cohort, row)
+            self.cohort.views[row] = student
+            self._rows[key] = row
+            if self._search is not None:
+                self._search.add(key, student.name)
+            for field, index in self._sorted.items():
+                index.add(self._sort_key(field, student.name if field == "name" else key), key)
+            self.version += 1
+            return row
+
+    def load(self, records):
+        # Bulk load from storage records: one vectorized append and regrade.
+        # Records with a missing or repeated ID are skipped (first one wins).
+        names = []
+        ids = []
+        scores = []
+        seen = set()
+        keys = self.cohort.schema.keys
+        for item in records:
+            raw_id = item.get("id_number", "")
+            key = normalize_id(raw_id)
+            if key == raw_id:
+                # Share the already-normalized string instead of a copy.
+                key = raw_id
+            if not key or key in self._rows or key in seen:
+                continue
+            seen.add(key)
+            names.append(item.get("name") or "")
+            ids.append(key)
+            scores.append([item.get(component, 0) for component in keys])
+        return self.add_many(names, ids, scores)
+
+    def add_many(self, names, ids, scores):
+        # Appends already-validated, normalized and unique students in one
+        # vectorized pass and returns their (start, stop) row range.
+        with self.lock:
+            start = len(self.cohort)
+            if not ids:
+                return start, start
+            self.cohort.extend(names, ids, np.asarray(scores, dtype=self.cohort.scores.dtype))
+            self._rows.update(zip(ids, range(start, start + len(ids))))
+            if self._search is not None:
+                self._search.add_many(names, ids)
+            for field, index in self._sorted.items():
+                values = names if field == "name" else ids
+                index.add_many((self._sort_key(field, value), key) for value, key in zip(values, ids))
+            self.version += 1
+            return start, start + len(ids)
+
+    def update(self, id_number, name, scores):
+        with self.lock:
+            row = self.row_of(id_number)
+            if row == -1:
+                raise KeyError(id_number)
+            key = self.cohort.ids[row]
+            index = self._sorted.get("name")
+            if index is not None:
+                index.remove(normalize_name(self.cohort.names[row]), key)
+                index.add(normalize_name(name), key)
+            self.cohort.set_row(row, name, scores)
+            if self._search is not None:
+                self._search.add(key, name)
+            self.version += 1
+            return row
+
+    def update_scores(self, rows, scores):
+        # Batch score update for an array of rows in one vectorized regrade.
+        with self.lock:
+            self.cohort.set_scores(rows, scores)
+            self.version += 1
+
+    def delete(self, id_number):
+        # Returns (row, moved_from): moved_from is the old row of the student
+        # that now occupies row, or -1 when the deleted student was last.
+        with self.lock:
+            key = normalize_id(id_number)
+            row = self._rows.pop(key)
+            if self._search is not None:
+                self._search.remove(key)
+            for field, index in self._sorted.items():
+                index.remove(self._sort_key(field, self.cohort.names[row] if field == "name" else key), key)
+            moved_from = self.cohort.swap_remove(row)
+            if moved_from != -1:
+                self._rows[self.cohort.ids[row]] = row
+            self.version += 1
+            return row, moved_from
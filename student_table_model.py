@@ -0,0 +1,425 @@
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractProxyModel, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from query_executor import ALL_GRADES, QueryExecutor, place_row, run_query
+
+
+def table_columns(schema):
+    # (header, field) for every column: one per assessment component
+    # between the ID and the computed columns.
+    return (
+        [("Name", "name"), ("ID Number", "id_number")]
+        + list(zip(schema.labels, schema.keys))
+        + [("Total", "total"), ("Grade", "grade"), ("Position", "position")]
+    )
+
+
+class StudentTableModel(QAbstractTableModel):
+    # Cells are produced on demand for the rows the view paints; mutations go
+    # through the helpers below so the view gets row-level signals.
+    #
+    # Names and component scores are editable in place. An accepted edit
+    # regrades that one row and emits edited(id_number); saving is left to
+    # the owner, which batches them.
+    edited = pyqtSignal(str)
+    # (row, moved_from), sent from inside the removal, once the repository
+    # has dropped the student at row and moved the one from moved_from (-1
+    # for none) into it.
+    student_removed = pyqtSignal(int, int)
+
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self.set_columns()
+
+    def set_columns(self):
+        columns = table_columns(self.repository.cohort.schema)
+        self.headers = [header for header, _ in columns]
+        self.fields = [field for _, field in columns]
+        self.first_score_column = 2
+        self.position_column = self.fields.index("position")
+
+    def component_of(self, column):
+        # Index of the assessment component shown in column, or -1.
+        component = column - self.first_score_column
+        return component if 0 <= component < len(self.repository.cohort.schema) else -1
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.repository)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.fields)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        student = self.repository.at(index.row())
+        field = self.fields[index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(getattr(student, field))
+        if role in (Qt.ItemDataRole.UserRole, Qt.ItemDataRole.EditRole):
+            return getattr(student, field)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() == 0:
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and (index.column() == 0 or self.component_of(index.column()) >= 0):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        # Rejects (returns False for) out-of-range scores, non-numbers and
+        # blank names, leaving the cell as it was.
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        row = index.row()
+        student = self.repository.at(row)
+        if index.column() == 0:
+            name = str(value).strip()
+            if not name or name == student.name:
+                return False
+            self.repository.update(student.id_number, name, student.scores)
+        else:
+            component = self.component_of(index.column())
+            if component < 0:
+                return False
+            try:
+                score = int(value)
+            except (TypeError, ValueError):
+                return False
+            scores = np.array([student.scores], dtype=np.int16)
+            if not 0 <= score <= self.repository.cohort.schema.maxima[component] or score == scores[0, component]:
+                return False
+            scores[0, component] = score
+            self.repository.update_scores(np.array([row]), scores)
+        self.student_updated(row)
+        self.positions_changed()
+        self.edited.emit(student.id_number)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def add_student(self, student):
+        self.repository.ensure_unique(student.id_number)
+        row = len(self.repository)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.repository.add(student)
+        self.endInsertRows()
+        self.positions_changed()
+
+    def add_students(self, names, ids, scores):
+        if not ids:
+            return len(self.repository), len(self.repository)
+        start = len(self.repository)
+        self.beginInsertRows(QModelIndex(), start, start + len(ids) - 1)
+        rows = self.repository.add_many(names, ids, scores)
+        self.endInsertRows()
+        self.positions_changed()
+        return rows
+
+    def update_scores(self, rows, scores):
+        if len(rows):
+            self.repository.update_scores(rows, scores)
+            self.dataChanged.emit(
+                self.index(int(rows.min()), self.first_score_column),
+                self.index(int(rows.max()), len(self.fields) - 1),
+            )
+            self.positions_changed()
+
+    def set_schema(self, schema):
+        # Columns follow the schema, so the whole model resets. Returns how
+        # many scores were capped (see Cohort.set_schema).
+        self.beginResetModel()
+        capped = self.repository.set_schema(schema)
+        self.set_columns()
+        self.endResetModel()
+        return capped
+
+    def update_student(self, id_number, name, scores):
+        row = self.repository.update(id_number, name, scores)
+        self.student_updated(row)
+        self.positions_changed()
+
+    def student_updated(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.fields) - 1))
+
+    def positions_changed(self):
+        # A position depends on every other total, so one score change can
+        # move any of them. The values themselves come from the cohort's
+        # histogram; this only tells the view to repaint the column.
+        if len(self.repository):
+            last = len(self.repository) - 1
+            self.dataChanged.emit(self.index(0, self.position_column), self.index(last, self.position_column))
+
+    def rows_changed(self):
+        if len(self.repository):
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.repository) - 1, len(self.fields) - 1))
+
+    def remove_student(self, id_number):
+        # The repository fills the hole with its last student, so the last
+        # row disappears and the freed row now shows the moved student.
+        if self.repository.row_of(id_number) == -1:
+            raise KeyError(id_number)
+        last = len(self.repository) - 1
+        self.beginRemoveRows(QModelIndex(), last, last)
+        row, moved_from = self.repository.delete(id_number)
+        self.student_removed.emit(row, moved_from)
+        self.endRemoveRows()
+        if moved_from != -1:
+            self.student_updated(row)
+        self.positions_changed()
+
+
+class StudentFilterProxyModel(QAbstractProxyModel):
+    # Shows the source rows listed in self.rows, in that order. The list is
+    # computed by query_executor.run_query on a worker thread whenever the
+    # filter or the roster changes, and swapped in when the latest query
+    # finishes, so filtering never blocks the GUI thread. Until then the
+    # previous result stays on screen, kept in step with row-level source
+    # changes. A change to a single student only moves that student's line
+    # (see place_row).
+    FUZZY_LIMIT = 50
+    # A query's error message; the previous rows stay on screen.
+    query_failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.grade = ALL_GRADES
+        self.search_text = ""
+        self.fuzzy = False
+        self.sort_field = None
+        self.descending = False
+        self.rows = np.zeros(0, dtype=np.int64)
+        self._proxy_rows = np.zeros(0, dtype=np.int64)
+        self.executor = QueryExecutor(self)
+        self.executor.ready.connect(self.apply_result)
+        self.executor.failed.connect(self.query_failed)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.dataChanged.connect(self.source_data_changed)
+        model.rowsInserted.connect(self.source_rows_inserted)
+        model.student_removed.connect(self.source_student_removed)
+        model.rowsRemoved.connect(self.source_rows_removed)
+        model.modelReset.connect(self.source_reset)
+        self.source_reset()
+
+    def is_filtered(self):
+        # True whenever the rows are not simply the roster in order.
+        return self.grade != ALL_GRADES or bool(self.search_text) or self.sort_field is not None
+
+    def set_filter(self, grade, search_text, fuzzy=False):
+        grade = grade or ALL_GRADES
+        search_text = search_text.strip().lower()
+        fuzzy = fuzzy and bool(search_text)
+        if grade == self.grade and search_text == self.search_text and fuzzy == self.fuzzy:
+            return
+        self.grade = grade
+        self.search_text = search_text
+        self.fuzzy = fuzzy
+        self.refresh()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # Called by the header; column -1 restores roster order.
+        fields = self.sourceModel().fields
+        sort_field = fields[column] if 0 <= column < len(fields) else None
+        descending = order == Qt.SortOrder.DescendingOrder
+        if sort_field == self.sort_field and descending == self.descending:
+            return
+        self.sort_field = sort_field
+        self.descending = descending
+        self.refresh()
+
+    def query(self):
+        return (
+            run_query, self.sourceModel().repository, self.grade, self.search_text, self.fuzzy, self.FUZZY_LIMIT,
+            self.sort_field, self.descending,
+        )
+
+    def refresh(self):
+        self.executor.submit(*self.query())
+
+    def settle(self):
+        # Brings self.rows up to date with the current filter before
+        # returning, for actions that work on exactly the rows shown. Blocks
+        # for as long as the query takes. Returns False if the query failed
+        # (query_failed has been emitted) and the rows are out of date.
+        return self.executor.run_now(*self.query())
+
+    def apply_result(self, result):
+        version, rows = result
+        if version != self.sourceModel().repository.version:
+            # The roster changed while the query ran; its rows are stale.
+            self.refresh()
+            return
+        if np.array_equal(rows, self.rows):
+            return
+        self.change_rows(rows)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._map_rows(rows)
+        self.endResetModel()
+
+    def change_rows(self, rows):
+        # Swaps in a query result as a layout change rather than a reset, so
+        # the current index, the selection and an open editor stay on their
+        # student (or are dropped if it left the table) and editing down a
+        # filtered or sorted table is not interrupted.
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        sources = [int(self.rows[index.row()]) for index in old]
+        self._map_rows(rows)
+        new = []
+        for index, source_row in zip(old, sources):
+            proxy_row = int(self._proxy_rows[source_row]) if source_row < len(self._proxy_rows) else -1
+            new.append(self.index(proxy_row, index.column()) if proxy_row >= 0 else QModelIndex())
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+
+    def _map_rows(self, rows):
+        self.rows = rows
+        self._proxy_rows = np.full(self.sourceModel().rowCount(), -1, dtype=np.int64)
+        self._proxy_rows[rows] = np.arange(len(rows))
+
+    def source_reset(self):
+        if self.sort_field not in self.sourceModel().fields:
+            # The column went away with an assessment schema change.
+            self.sort_field = None
+        self.set_rows(self.sourceModel().repository.cohort.roster_order())
+        if self.is_filtered():
+            self.refresh()
+
+    def source_data_changed(self, top_left, bottom_right, roles=()):
+        mapped = self._proxy_rows[top_left.row():bottom_right.row() + 1]
+        mapped = mapped[mapped >= 0]
+        if len(mapped):
+            self.dataChanged.emit(
+                self.index(int(mapped.min()), top_left.column()),
+                self.index(int(mapped.max()), bottom_right.column()),
+            )
+        if not self.is_filtered():
+            return
+        position_column = self.sourceModel().position_column
+        if top_left.column() == bottom_right.column() == position_column:
+            # Positions follow totals, whose changes arrive row by row.
+            return
+        if top_left.row() == bottom_right.row() and not self.fuzzy:
+            self.place_row(top_left.row())
+        else:
+            self.refresh()
+
+    def place_row(self, row):
+        # One student changed: moves just that line to where run_query
+        # would put it, or into or out of the table, instead of querying
+        # the whole roster again.
+        old = int(self._proxy_rows[row])
+        rest = self.rows if old < 0 else np.delete(self.rows, old)
+        new = place_row(
+            self.sourceModel().repository, rest, row, self.grade, self.search_text, self.sort_field, self.descending
+        )
+        if new < 0:
+            if old < 0:
+                return
+            self.beginRemoveRows(QModelIndex(), old, old)
+            self.rows = rest
+            self._proxy_rows[row] = -1
+            self.endRemoveRows()
+            start, stop = old, len(self.rows)
+        elif old < 0:
+            self.beginInsertRows(QModelIndex(), new, new)
+            self.rows = np.insert(rest, new, row)
+            self.endInsertRows()
+            start, stop = new, len(self.rows)
+        elif new != old:
+            self.beginMoveRows(QModelIndex(), old, old, QModelIndex(), new if new < old else new + 1)
+            self.rows = np.insert(rest, new, row)
+            self.endMoveRows()
+            start, stop = min(old, new), max(old, new) + 1
+        else:
+            return
+        self._proxy_rows[self.rows[start:stop]] = np.arange(start, stop)
+
+    def source_rows_inserted(self, parent, first, last):
+        count = last - first + 1
+        self._proxy_rows = np.concatenate([self._proxy_rows, np.full(count, -1, dtype=np.int64)])
+        if self.is_filtered():
+            if count == 1 and not self.fuzzy:
+                self.place_row(first)
+            else:
+                self.refresh()
+            return
+        # Unfiltered: new rows show up straight away at the end.
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + count - 1)
+        self.rows = np.concatenate([self.rows, np.arange(first, last + 1)])
+        self._proxy_rows[first:last + 1] = np.arange(start, start + count)
+        self.endInsertRows()
+
+    def source_student_removed(self, row, moved_from):
+        # Drops the deleted student's line; the student moved into its
+        # source row keeps its place in the table.
+        proxy_row = int(self._proxy_rows[row])
+        if proxy_row >= 0:
+            self.beginRemoveRows(QModelIndex(), proxy_row, proxy_row)
+            self.rows = np.delete(self.rows, proxy_row)
+            self.endRemoveRows()
+        if moved_from != -1:
+            self.rows[self.rows == moved_from] = row
+        self._proxy_rows = np.full(self.sourceModel().rowCount(), -1, dtype=np.int64)
+        self._proxy_rows[self.rows] = np.arange(len(self.rows))
+
+    def source_rows_removed(self, parent, first, last):
+        # Dropping a line leaves the rest in order; only a fuzzy top list
+        # can take in another student.
+        if self.fuzzy:
+            self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid() or source_index.row() >= len(self._proxy_rows):
+            return QModelIndex()
+        proxy_row = int(self._proxy_rows[source_index.row()])
+        if proxy_row < 0:
+            return QModelIndex()
+        return self.index(proxy_row, source_index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        # Rows are numbered by their place in the table, not their source
+        # row, which deletes reshuffle.
+        return self.sourceModel().headerData(section, orientation, role)
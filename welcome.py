@@ -2,10 +2,12 @@ from PyQt6.QtWidgets import (
     QApplication,  QWidget, QVBoxLayout, QHBoxLayout,
    QLabel, QProgressBar
 )
-from PyQt6.QtGui import QPixmap, QFont
+from PyQt6.QtGui import QFont
 
 from PyQt6.QtCore import Qt
 
+import assets
+
 class SplashScreen(QWidget):
     def __init__(self):
         super().__init__()
@@ -22,9 +24,9 @@ class SplashScreen(QWidget):
         task_name.setStyleSheet("color: #c0c0c0;")
         # Logo
         logo = QLabel()
-        pixmap = QPixmap("images/mau.png")
+        pixmap = assets.pixmap(assets.LOGO, 100, 100)
         if not pixmap.isNull():
-            logo.setPixmap(pixmap.scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio))
+            logo.setPixmap(pixmap)
         logo.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Title